@@ -0,0 +1,291 @@
+"""
+Compression middleware: gzip / brotli responses and gzip / zstd request bodies.
+
+Request bodies are decompressed before they reach the routes, with the size
+limit applied to the decompressed bytes (so a small compressed body cannot
+expand into gigabytes). Brotli and zstd are used when their packages are
+installed; gzip always works.
+"""
+import json
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+from starlette.exceptions import HTTPException
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd as _zstd  # Python 3.14+
+except ImportError:
+    _zstd = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Streams that must reach the client chunk by chunk without a compression layer in between
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript")
+
+
+def request_encodings() -> List[str]:
+    """Content-Encodings accepted on request bodies"""
+    encodings = ["gzip"]
+    if _zstd is not None or zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+
+def _decompress(encoding: str, data: bytes, limit: int) -> Optional[bytes]:
+    """Decompressed data, or None if it is larger than `limit` bytes"""
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        result = decompressor.decompress(data, limit + 1)
+        if len(result) > limit or decompressor.unconsumed_tail:
+            return None
+        if not decompressor.eof:
+            raise ValueError("truncated gzip body")
+        return result
+    if _zstd is not None:
+        decompressor = _zstd.ZstdDecompressor()
+        result = decompressor.decompress(data, max_length=limit + 1)
+        if len(result) > limit:
+            return None
+        if not decompressor.eof:
+            raise ValueError("truncated zstd body")
+        return result
+    reader = zstandard.ZstdDecompressor().stream_reader(data)
+    parts, size = [], 0
+    while size <= limit:
+        chunk = reader.read(limit + 1 - size)
+        if not chunk:
+            break
+        parts.append(chunk)
+        size += len(chunk)
+    return None if size > limit else b"".join(parts)
+
+
+class _BodyError(HTTPException):
+    # An HTTPException, so that raised from `receive` inside a route it is
+    # rendered as this status rather than as a generic body parsing error
+    def __init__(self, status: int, detail: str):
+        super().__init__(status, detail)
+        self.status = status
+
+
+class _Compressor:
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=min(level, 11))
+        else:
+            self._impl = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so each streamed chunk reaches the client right away"""
+        if self.encoding == "br":
+            return self._impl.process(data) + self._impl.flush()
+        return self._impl.compress(data) + self._impl.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._impl.process(data) + self._impl.finish()
+        return self._impl.compress(data) + self._impl.flush()
+
+
+class CompressionMiddleware:
+    """ASGI middleware; see the module docstring"""
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 max_body_bytes: int = 10 * 1024 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_encoding = headers.get(b"content-encoding", b"").decode("latin-1").strip().lower()
+        if content_encoding and content_encoding != "identity":
+            try:
+                scope, receive = await self._decompressed_request(scope, receive, content_encoding)
+            except _BodyError as e:
+                await self._error(send, e.status, e.detail)
+                return
+        else:
+            try:
+                declared = int(headers.get(b"content-length", b"0") or b"0")
+            except ValueError:
+                declared = -1
+            if declared < 0:
+                await self._error(send, 400, "Invalid Content-Length header")
+                return
+            if declared > self.max_body_bytes:
+                await self._error(send, 413, f"Request body larger than {self.max_body_bytes} bytes")
+                return
+            # Chunked uploads declare no length; count what actually arrives
+            receive = self._limited_receive(receive)
+
+        responded = False
+
+        async def tracked_send(message):
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+            await send(message)
+
+        encoding = self._response_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        try:
+            if encoding is None:
+                await self.app(scope, receive, tracked_send)
+            else:
+                await self.app(scope, receive, self._compressing_send(tracked_send, encoding))
+        except _BodyError as e:
+            if responded:
+                raise
+            await self._error(send, e.status, e.detail)
+
+    def _limited_receive(self, receive: Callable) -> Callable:
+        received = 0
+
+        async def limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    raise _BodyError(413, f"Request body larger than {self.max_body_bytes} bytes")
+            return message
+
+        return limited
+
+    async def _decompressed_request(self, scope, receive, encoding: str):
+        if encoding not in request_encodings():
+            raise _BodyError(415, f"Unsupported Content-Encoding '{encoding}' (supported: {', '.join(request_encodings())})")
+
+        parts = []
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise _BodyError(400, "Client disconnected")
+            parts.append(message.get("body", b""))
+            received += len(parts[-1])
+            # Compressed data is never larger than the limit for sane inputs
+            if received > self.max_body_bytes:
+                raise _BodyError(413, f"Request body larger than {self.max_body_bytes} bytes")
+            more_body = message.get("more_body", False)
+
+        try:
+            body = _decompress(encoding, b"".join(parts), self.max_body_bytes)
+        except Exception as e:
+            raise _BodyError(400, f"Invalid {encoding} body: {e}")
+        if body is None:
+            raise _BodyError(413, f"Decompressed request body larger than {self.max_body_bytes} bytes")
+
+        headers = [(name, value) for name, value in scope["headers"] if name not in (b"content-encoding", b"content-length")]
+        headers.append((b"content-length", str(len(body)).encode()))
+        sent = False
+
+        async def replay():
+            nonlocal sent
+            if sent:
+                return await receive()
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return dict(scope, headers=headers), replay
+
+    def _response_encoding(self, accept_encoding: str) -> Optional[str]:
+        accepted = {}
+        for item in accept_encoding.split(","):
+            name, _, params = item.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            if name:
+                accepted[name.strip().lower()] = quality
+        if brotli is not None and accepted.get("br", 0) > 0:
+            return "br"
+        if accepted.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    def _compressing_send(self, send: Callable, encoding: str) -> Callable:
+        start: Optional[dict] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def wrapped(message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = dict(start.get("headers", []))
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (b"content-encoding" in headers or content_type.startswith(UNCOMPRESSED_TYPES)
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                level = self.brotli_quality if encoding == "br" else self.gzip_level
+                compressor = _Compressor(encoding, level)
+                if not more_body:
+                    body = compressor.finish(body)
+                    await send(self._compressed_start(start, encoding, len(body)))
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(self._compressed_start(start, encoding, None))
+
+            data = compressor.chunk(body) if more_body else compressor.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        return wrapped
+
+    @staticmethod
+    def _compressed_start(start: dict, encoding: str, length: Optional[int]) -> dict:
+        headers: List[Tuple[bytes, bytes]] = [
+            (name, value) for name, value in start.get("headers", []) if name not in (b"content-length", b"etag")
+        ]
+        # Keep validators usable: the body differs from the identity encoding
+        etag = dict(start.get("headers", [])).get(b"etag")
+        if etag is not None:
+            headers.append((b"etag", etag if etag.startswith(b"W/") else b"W/" + etag))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return dict(start, headers=headers)
+
+    @staticmethod
+    async def _error(send: Callable, status: int, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
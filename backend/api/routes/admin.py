@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Header, HTTPException
+from pydantic import BaseModel
+from typing import Optional
+import hmac
+import os
+
+from .process import get_ai_service
+
+router = APIRouter()
+
+class InvalidateRequest(BaseModel):
+    prefix: Optional[str] = None
+    version: Optional[str] = None
+    stale: Optional[bool] = False
+
+def _check_admin_token(token: Optional[str]):
+    # Admin endpoints are disabled unless ADMIN_TOKEN is configured
+    admin_token = os.getenv("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin API disabled - set ADMIN_TOKEN")
+    # Constant-time comparison, so response timing does not reveal the token
+    if token is None or not hmac.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@router.post("/admin/cache/invalidate")
+async def invalidate_cache(request: InvalidateRequest, x_admin_token: Optional[str] = Header(None)):
+    """Evict cached results by key prefix, prompt version, or everything outside the current namespace"""
+    _check_admin_token(x_admin_token)
+    if not (request.prefix or request.version or request.stale):
+        raise HTTPException(status_code=400, detail="Provide prefix, version or stale=true")
+    
+    ai_service = get_ai_service()
+    removed = await ai_service.invalidate(prefix=request.prefix, version=request.version, stale=bool(request.stale))
+    return {"removed": removed, "namespace": ai_service._cache_namespace()}
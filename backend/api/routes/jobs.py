@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict
+from functools import lru_cache
+import os
+
+from services.job_queue import JobQueue
+from .process import get_ai_service, ProcessRequest
+
+router = APIRouter()
+
+@lru_cache(maxsize=None)
+def get_job_queue() -> JobQueue:
+    return JobQueue(
+        get_ai_service(),
+        workers=int(os.getenv("JOB_WORKERS", "2")),
+        lease_ttl=float(os.getenv("JOB_LEASE_TTL", "60"))
+    )
+
+def _job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    response = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+    }
+    if job["status"] == "done":
+        response["result"] = job["result"]
+    elif job["status"] == "failed":
+        response["error"] = job["error"]
+    return response
+
+@router.post("/jobs", status_code=202)
+async def create_job(request: ProcessRequest):
+    """Queue a lecture for processing and return immediately with a job ID"""
+    if not request.transcript:
+        raise HTTPException(status_code=400, detail="Transcript is required")
+    
+    job = await get_job_queue().submit(request.model_dump())
+    response = _job_response(job)
+    response["status_url"] = f"/api/jobs/{job['id']}"
+    return response
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
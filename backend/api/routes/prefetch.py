@@ -0,0 +1,42 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import List
+from functools import lru_cache
+import os
+
+from services.prefetcher import Prefetcher
+from .process import get_ai_service, ProcessRequest
+
+router = APIRouter()
+
+@lru_cache(maxsize=None)
+def get_prefetcher() -> Prefetcher:
+    return Prefetcher(
+        get_ai_service(),
+        idle_seconds=float(os.getenv("PREFETCH_IDLE_SECONDS", "2")),
+        per_minute=float(os.getenv("PREFETCH_PER_MINUTE", "4")),
+        min_headroom=float(os.getenv("PREFETCH_MIN_HEADROOM", "0.5")),
+        max_queue=int(os.getenv("PREFETCH_MAX_QUEUE", "20"))
+    )
+
+class PrefetchRequest(BaseModel):
+    items: List[ProcessRequest]
+
+@router.post("/prefetch", status_code=202)
+async def prefetch(request: PrefetchRequest):
+    """
+    Queue upcoming lectures (next first) to be processed in the background while
+    the server is otherwise idle. Replaces any earlier prefetch still queued.
+    """
+    if os.getenv("PREFETCH_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        raise HTTPException(status_code=503, detail="Prefetching is disabled")
+    if not request.items:
+        raise HTTPException(status_code=400, detail="At least one item is required")
+    
+    prefetcher = get_prefetcher()
+    accepted = await prefetcher.submit([item.model_dump() for item in request.items])
+    return {**accepted, "stats": prefetcher.stats()}
+
+@router.get("/prefetch")
+async def prefetch_status():
+    return get_prefetcher().stats()
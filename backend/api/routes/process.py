@@ -1,13 +1,33 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
+from functools import lru_cache
 import sys
 import os
+import json
+import hashlib
+import re
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from services.ai_service import AIService
+from config import load_env
+from services.provider_router import ProviderError
 
+if TYPE_CHECKING:
+    from services.ai_service import AIService
+
+load_env()
 router = APIRouter()
-ai_service = AIService()
+
+@lru_cache(maxsize=None)
+def get_ai_service() -> "AIService":
+    """The shared AIService, built on first use so importing the app stays fast"""
+    from services.ai_service import AIService
+    return AIService()
+
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "3"))
+
+_MD5_HEX = re.compile(r"[0-9a-fA-F]{32}")
 
 class ProcessRequest(BaseModel):
     transcript: str
@@ -15,10 +35,16 @@ class ProcessRequest(BaseModel):
     course_title: Optional[str] = None
     force_refresh: Optional[bool] = False
 
+class BatchProcessRequest(BaseModel):
+    items: List[ProcessRequest]
+    concurrency: Optional[int] = None
+
 class ProcessResponse(BaseModel):
     summary: str
     code_blocks: List[str]
     key_concepts: List[str]
+    # True when every provider failed and the summary was built locally (not cached)
+    fallback: bool = False
 
 @router.post("/process", response_model=ProcessResponse)
 async def process_transcript(request: ProcessRequest):
@@ -27,11 +53,83 @@ async def process_transcript(request: ProcessRequest):
     
     try:
         # call AI service
-        result = await ai_service.process_lecture(
+        result = await get_ai_service().process_lecture(
             transcript=request.transcript,
             lecture_title=request.lecture_title,
             force_refresh=request.force_refresh
         )
         return result
+    except ProviderError as e:
+        # Every configured provider failed
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/summary/{transcript_hash}", response_model=ProcessResponse)
+async def get_summary(transcript_hash: str, request: Request):
+    """
+    Cached result for the MD5 hex digest of a transcript (UTF-8), so clients can
+    skip uploading transcripts the server already has. Supports If-None-Match;
+    404 means the transcript has to be POSTed to /process.
+    """
+    if not _MD5_HEX.fullmatch(transcript_hash):
+        raise HTTPException(status_code=400, detail="Expected the MD5 hex digest of the transcript")
+    
+    result = await get_ai_service().get_cached_result(transcript_hash.lower())
+    if result is None:
+        raise HTTPException(status_code=404, detail="Not cached - POST the transcript to /api/process")
+    
+    # Only the public fields - internal ones (e.g. stage versions) stay on the server
+    body = json.dumps(ProcessResponse.model_validate(result).model_dump(), sort_keys=True)
+    etag = f'"{hashlib.md5(body.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+@router.post("/process/stream")
+async def process_transcript_stream(request: ProcessRequest):
+    """Same as /process, but relays the summary as Server-Sent Events while it is generated"""
+    if not request.transcript:
+        raise HTTPException(status_code=400, detail="Transcript is required")
+    
+    async def event_stream():
+        try:
+            async for event in get_ai_service().stream_lecture(
+                transcript=request.transcript,
+                lecture_title=request.lecture_title,
+                force_refresh=request.force_refresh
+            ):
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/process/batch")
+async def process_batch(request: BatchProcessRequest):
+    """Process a list of lectures, streaming one NDJSON line per item as it finishes"""
+    if not request.items:
+        raise HTTPException(status_code=400, detail="At least one item is required")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    
+    # Clients may lower the concurrency, never raise it above the server limit
+    concurrency = min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)
+    items = [item.model_dump() for item in request.items]
+    
+    async def result_lines():
+        async for item_result in get_ai_service().process_batch(items, concurrency=concurrency):
+            yield json.dumps(item_result) + "\n"
+    
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
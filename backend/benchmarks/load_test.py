@@ -0,0 +1,230 @@
+"""
+Offline load test: drives the FastAPI app through /api/process against the
+local stub LLM server and reports throughput, latency percentiles, cache
+behaviour and memory growth.
+
+    cd backend
+    python -m benchmarks.load_test --requests 500 --concurrency 32 --unique 50 --output bench.json
+    python -m benchmarks.load_test --compare bench.json      # re-run and diff against a previous run
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.stub_llm_server import StubConfig, StubServer  # noqa: E402
+
+WORDS = ("gradient descent minimizes the loss by stepping against the gradient so the learning rate "
+         "controls step size while momentum smooths noisy updates and regularization limits overfitting").split()
+
+
+def make_transcript(index: int, chars: int) -> str:
+    """Deterministic, distinct caption-like transcript of roughly `chars` characters"""
+    rng = random.Random(index)
+    lines = [f"Lecture {index}."]
+    length = len(lines[0])
+    while length < chars:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + "."
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (Linux /proc, falling back to peak RSS)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def configure_environment(args: argparse.Namespace, stub: StubServer) -> None:
+    # Must happen before the app is imported: settings are read from the environment
+    os.environ.update({
+        "GROQ_API_KEY": "bench-key",
+        "GROQ_BASE_URL": f"{stub.url}/openai/v1",
+        "HUGGINGFACE_API_KEY": "",
+        "OPENAI_API_KEY": "",
+        "RESULT_STORE_PATH": args.store_path or "",
+        "GROQ_RPM": str(args.rpm),
+        "GROQ_TPM": str(args.tpm),
+        "HTTP_MAX_CONNECTIONS": str(max(20, args.concurrency)),
+        "HTTP_MAX_KEEPALIVE": str(max(10, args.concurrency)),
+    })
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    import main
+
+    transcripts = [make_transcript(i, args.transcript_chars) for i in range(args.unique)]
+    rng = random.Random(args.seed)
+    schedule = [rng.randrange(args.unique) for _ in range(args.requests)]
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    next_index = 0
+
+    await main.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+
+        async def worker():
+            nonlocal next_index
+            while next_index < len(schedule):
+                transcript = transcripts[schedule[next_index]]
+                next_index += 1
+                started = time.perf_counter()
+                response = await client.post("/api/process", json={"transcript": transcript, "lecture_title": "Bench"})
+                latencies.append(time.perf_counter() - started)
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+        rss_before = current_rss_bytes()
+        tracemalloc.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = current_rss_bytes()
+
+        metrics_text = (await client.get("/metrics")).text
+    await main.shutdown()
+
+    service = main.process.get_ai_service()
+    return {
+        "elapsed_seconds": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_seconds": {
+            "mean": round(sum(latencies) / len(latencies), 5) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 5),
+            "p95": round(percentile(latencies, 95), 5),
+            "p99": round(percentile(latencies, 99), 5),
+            "max": round(max(latencies), 5) if latencies else 0.0,
+        },
+        "status_codes": statuses,
+        "cache": service._cache.stats(),
+        "coalesced_requests": service._inflight.coalesced,
+        "memory_bytes": {
+            "rss_before": rss_before,
+            "rss_after": rss_after,
+            "rss_growth": rss_after - rss_before,
+            "traced_current": traced_current,
+            "traced_peak": traced_peak,
+        },
+        "metrics_lines": len(metrics_text.splitlines()),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Human-readable deltas for the headline numbers"""
+    rows = [
+        ("throughput_rps", lambda r: r["results"]["throughput_rps"], True),
+        ("p50", lambda r: r["results"]["latency_seconds"]["p50"], False),
+        ("p95", lambda r: r["results"]["latency_seconds"]["p95"], False),
+        ("p99", lambda r: r["results"]["latency_seconds"]["p99"], False),
+        ("upstream_calls", lambda r: r["results"]["upstream_calls"], False),
+        ("rss_growth", lambda r: r["results"]["memory_bytes"]["rss_growth"], False),
+    ]
+    lines = [f"Comparing against {baseline.get('commit')} ({baseline.get('timestamp')})"]
+    for name, get, higher_is_better in rows:
+        try:
+            old, new = get(baseline), get(current)
+        except KeyError:
+            continue
+        change = ((new - old) / old * 100) if old else 0.0
+        better = (change > 0) == higher_is_better or change == 0
+        lines.append(f"  {name:<16} {old:>14} -> {new:<14} ({change:+.1f}% {'ok' if better else 'REGRESSION?'})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for /api/process")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--unique", type=int, default=40, help="distinct transcripts (controls cache hit rate)")
+    parser.add_argument("--transcript-chars", type=int, default=6000)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub seconds before first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="stub generation speed (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--rpm", type=float, default=1_000_000, help="scheduler requests/minute (default: unthrottled)")
+    parser.add_argument("--tpm", type=float, default=1_000_000_000, help="scheduler tokens/minute (default: unthrottled)")
+    parser.add_argument("--store-path", default="", help="result store path (default: disabled)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="previous JSON results to diff against")
+    parser.add_argument("--verbose", action="store_true", help="show service logs")
+    args = parser.parse_args()
+
+    stub_config = StubConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    stub = StubServer(stub_config, port=args.port).start()
+    configure_environment(args, stub)
+
+    try:
+        logs = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with logs:
+            results = asyncio.run(run_load(args))
+    finally:
+        stub.stop()
+    results["upstream_calls"] = stub_config.counters["requests"]
+    results["upstream_errors"] = stub_config.counters["errors"]
+
+    report = {
+        "benchmark": "process_load",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "parameters": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "verbose")},
+        "results": results,
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print("\n".join(compare(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Cold start benchmark: import time of the app, startup hooks, and the first
+requests, each measured in a fresh interpreter.
+
+    cd backend
+    python -m benchmarks.startup --runs 5 --output startup.json
+    python -m benchmarks.startup --compare startup.json      # re-run and diff against a previous run
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from benchmarks.load_test import git_commit  # noqa: E402
+
+PHASES = ("import_seconds", "startup_seconds", "first_health_seconds", "first_process_seconds", "total_seconds")
+
+# Runs in the child interpreter; prints one JSON line with the timings
+CHILD = """
+import asyncio, contextlib, io, json, time
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    import main
+imported = time.perf_counter()
+
+async def run():
+    import httpx
+    timings = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        began = time.perf_counter()
+        await main.startup()
+        timings["startup_seconds"] = time.perf_counter() - began
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            began = time.perf_counter()
+            (await client.get("/health")).raise_for_status()
+            timings["first_health_seconds"] = time.perf_counter() - began
+            began = time.perf_counter()
+            (await client.post("/api/process", json={"transcript": "Cold start probe.", "lecture_title": "Probe"})).raise_for_status()
+            timings["first_process_seconds"] = time.perf_counter() - began
+        await main.shutdown()
+    return timings
+
+timings = asyncio.run(run())
+timings["import_seconds"] = imported - started
+timings["total_seconds"] = time.perf_counter() - started
+print(json.dumps(timings))
+"""
+
+
+def run_once() -> Dict[str, float]:
+    # No provider keys and no store: measures our own start-up, not the network or disk
+    env = dict(os.environ, GROQ_API_KEY="", HUGGINGFACE_API_KEY="", OPENAI_API_KEY="", RESULT_STORE_PATH="")
+    output = subprocess.check_output([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int) -> List[Dict[str, Any]]:
+    """Top cumulative import times for `import main` (python -X importtime)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append({"module": parts[2].strip(), "cumulative_ms": round(int(parts[1]) / 1000, 1)})
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    lines = [f"Comparing against {baseline.get('commit')} ({baseline.get('timestamp')})"]
+    for phase in PHASES:
+        old = baseline["results"].get(phase, {}).get("median")
+        new = current["results"][phase]["median"]
+        if old is None:
+            continue
+        change = ((new - old) / old * 100) if old else 0.0
+        lines.append(f"  {phase:<22} {old:>10} -> {new:<10} ({change:+.1f}% {'ok' if change <= threshold else 'REGRESSION?'})")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark (import, startup, first requests)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--imports", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="previous JSON results to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slowdown reported as a regression")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    results = {
+        phase: {
+            "median": round(statistics.median(run[phase] for run in runs), 4),
+            "min": round(min(run[phase] for run in runs), 4),
+            "max": round(max(run[phase] for run in runs), 4),
+        }
+        for phase in PHASES
+    }
+    report = {
+        "benchmark": "cold_start",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "parameters": {"runs": args.runs, "python": sys.version.split()[0]},
+        "results": results,
+        "slowest_imports": slowest_imports(args.imports),
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        print("\n".join(compare(report, baseline, args.threshold)))
+
+
+if __name__ == "__main__":
+    main()
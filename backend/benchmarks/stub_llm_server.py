@@ -0,0 +1,176 @@
+"""
+Local stand-in for the Groq (OpenAI-compatible) and Hugging Face inference APIs.
+
+Used by the benchmarks so everything runs offline with controllable latency,
+token throughput and error injection:
+
+    python -m benchmarks.stub_llm_server --port 8765 --latency 0.3 --tokens-per-second 400
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLE_SUMMARY = """# Stub Lecture Summary
+
+## 1. Big Picture
+- **Gradient descent** minimises a loss function step by step
+- The learning rate $\\alpha$ controls the step size
+
+## 2. Code Example
+```python
+for step in range(100):
+    w = w - lr * grad(w)
+```
+
+## Summary
+- Gradients point uphill, so we step the other way
+- Too large a learning rate diverges, too small is slow
+"""
+
+
+@dataclass
+class StubConfig:
+    latency: float = 0.2            # seconds before the first token
+    tokens_per_second: float = 0.0  # 0 = whole completion at once
+    completion_tokens: int = 200
+    error_rate: float = 0.0         # fraction of requests answered with error_status
+    error_status: int = 503
+    seed: int = 0
+    counters: Dict[str, int] = field(default_factory=lambda: {"requests": 0, "errors": 0})
+
+
+def create_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="Stub LLM server")
+    rng = random.Random(config.seed)
+
+    def completion_text() -> str:
+        # ~4 characters per token, padded from the sample summary
+        target = config.completion_tokens * 4
+        return (SAMPLE_SUMMARY * (target // len(SAMPLE_SUMMARY) + 1))[:target]
+
+    def maybe_error():
+        config.counters["requests"] += 1
+        if config.error_rate and rng.random() < config.error_rate:
+            config.counters["errors"] += 1
+            headers = {"retry-after": "1"} if config.error_status == 429 else {}
+            return JSONResponse({"error": {"message": "injected failure"}}, status_code=config.error_status, headers=headers)
+        return None
+
+    async def generation_time() -> None:
+        await asyncio.sleep(config.latency)
+        if config.tokens_per_second:
+            await asyncio.sleep(config.completion_tokens / config.tokens_per_second)
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        error = maybe_error()
+        if error is not None:
+            return error
+
+        prompt_tokens = len(body["messages"][0]["content"]) // 4
+        text = completion_text()
+        headers = {
+            "x-ratelimit-remaining-tokens": "1000000",
+            "x-ratelimit-remaining-requests": "100000",
+        }
+
+        if not body.get("stream"):
+            await generation_time()
+            return JSONResponse({
+                "choices": [{"message": {"role": "assistant", "content": text}}],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": config.completion_tokens,
+                    "total_tokens": prompt_tokens + config.completion_tokens,
+                },
+            }, headers=headers)
+
+        async def events():
+            await asyncio.sleep(config.latency)
+            words = text.split(" ")
+            delay = (config.completion_tokens / config.tokens_per_second) / len(words) if config.tokens_per_second else 0
+            for word in words:
+                chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                if delay:
+                    await asyncio.sleep(delay)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+    @app.post("/models/{owner}/{model}")
+    async def huggingface(owner: str, model: str):
+        error = maybe_error()
+        if error is not None:
+            return error
+        await generation_time()
+        return [{"generated_text": completion_text()}]
+
+    @app.get("/stats")
+    async def stats():
+        return config.counters
+
+    return app
+
+
+class StubServer:
+    """Runs the stub app with uvicorn in a background thread"""
+
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 8765):
+        self.config = config
+        self.host = host
+        self.port = port
+        self._server = uvicorn.Server(uvicorn.Config(create_app(config), host=host, port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub LLM server did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline stub for the Groq / Hugging Face APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--completion-tokens", type=int, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,49 @@
-"""Configuration loaded from .env file"""
+"""Configuration loaded from .env file (parsed once, on first use)"""
+import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Dict, Optional
 
-# Read .env file
-env_path = Path(__file__).parent / '.env'
-print(f"[Config] Looking for .env at: {env_path}")
-print(f"[Config] .env exists: {env_path.exists()}")
-print(f"[Config] __file__ is: {__file__}")
-print(f"[Config] parent is: {Path(__file__).parent}")
-
-config = {}
-
-if env_path.exists():
-    print(f"[Config] Reading .env file...")
-    with open(env_path, 'r', encoding='utf-8-sig') as f:  # utf-8-sig strips BOM automatically
-        content = f.read()
-        print(f"[Config] File content ({len(content)} chars): {content[:100]}")
-        for line in content.splitlines():
+ENV_PATH = Path(__file__).parent / '.env'
+
+
+@lru_cache(maxsize=None)
+def load_env(path: Path = ENV_PATH) -> Dict[str, str]:
+    """
+    Parse the .env file and export its values to os.environ.
+
+    Variables already set in the real environment win. Cached, so calling
+    it from every entry point costs nothing after the first time.
+    """
+    values: Dict[str, str] = {}
+    if not path.exists():
+        return values
+    with open(path, 'r', encoding='utf-8-sig') as f:  # utf-8-sig strips BOM automatically
+        for line in f:
             line = line.strip()
-            print(f"[Config] Processing line: '{line}'")
-            if line and not line.startswith('#') and '=' in line:
-                key, value = line.split('=', 1)
-                # Strip BOM and whitespace from key
-                key_clean = key.strip().lstrip('\ufeff')
-                config[key_clean] = value.strip()
-                print(f"[Config] Set {key_clean} = {value.strip()[:20]}...")
-else:
-    print(f"[Config] .env file NOT FOUND!")
-
-# Export the API key
-HUGGINGFACE_API_KEY = config.get('HUGGINGFACE_API_KEY', '')
-GROQ_API_KEY = config.get('GROQ_API_KEY', '')
-OPENAI_API_KEY = config.get('OPENAI_API_KEY', '')
-
-print(f"[Config] Final config dict: {list(config.keys())}")
-print(f"[Config] Loaded HUGGINGFACE_API_KEY: {bool(HUGGINGFACE_API_KEY)}")
-if HUGGINGFACE_API_KEY:
-    print(f"[Config] Key preview: {HUGGINGFACE_API_KEY[:20]}...")
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            # Strip BOM and whitespace from key, optional quotes from value
+            key = key.strip().lstrip('\ufeff')
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in ('"', "'"):
+                value = value[1:-1]
+            values[key] = value
+    for key, value in values.items():
+        os.environ.setdefault(key, value)
+    return values
+
+
+def get_setting(name: str, default: Optional[str] = None) -> Optional[str]:
+    load_env()
+    return os.environ.get(name, default)
+
+
+def __getattr__(name: str):
+    # Backwards compatible module attributes (config.GROQ_API_KEY etc.), resolved lazily
+    if name in ('HUGGINGFACE_API_KEY', 'GROQ_API_KEY', 'OPENAI_API_KEY'):
+        return get_setting(name, '')
+    if name == 'config':
+        return dict(load_env())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
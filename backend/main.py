@@ -1,12 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import os
+import time
+
+from config import load_env
+load_env()
 
 app = FastAPI(title="Udemy AI Smart Overview API")
 
-# Configure CORS
+# gzip/brotli responses; gzip/zstd request bodies, size-limited after decompression.
+# Added before CORS so CORS wraps it and its 413/415/400 replies carry CORS headers
+from api.compression import CompressionMiddleware
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESS_MIN_BYTES", "1024")),
+    max_body_bytes=int(os.getenv("MAX_REQUEST_BYTES", str(10 * 1024 * 1024))),
+)
+
+# Configure CORS (the last middleware added is the outermost)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -15,8 +29,82 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from api.routes import process
+from api.routes import process, jobs, admin, prefetch
+from services.http_client import close_http_client
+from services import metrics
 app.include_router(process.router, prefix="/api")
+app.include_router(jobs.router, prefix="/api")
+app.include_router(admin.router, prefix="/api")
+app.include_router(prefetch.router, prefix="/api")
+
+@app.on_event("startup")
+async def startup():
+    # The job queue - and with it the AI service - is built here rather than at
+    # import time, so jobs interrupted by the last shutdown resume right away;
+    # the pooled HTTP client is opened by the first provider call
+    await jobs.get_job_queue().start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await jobs.get_job_queue().stop()
+    await prefetch.get_prefetcher().stop()
+    await close_http_client()
+
+def _route_template(request: Request) -> str:
+    """Path of the matched route, e.g. /api/jobs/{job_id}"""
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Newer FastAPI versions leave the include_router prefix out of route.path;
+    # the prefix is static, so take it from the URL
+    template = route.path.strip("/").split("/")
+    segments = request.url.path.strip("/").split("/")
+    return "/" + "/".join(segments[:max(0, len(segments) - len(template))] + template)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.HTTP_IN_FLIGHT.dec()
+        # Label by route template (e.g. /api/jobs/{job_id}) to keep cardinality bounded
+        path = _route_template(request)
+        metrics.HTTP_REQUESTS.inc(path=path, method=request.method, status=status)
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - started, path=path)
+
+def collect_service_metrics():
+    stats = process.get_ai_service().stats()
+    cache_stats = stats["cache"]
+    for event in ("hits", "misses", "evictions", "expirations"):
+        metrics.CACHE_EVENTS.set_total(cache_stats[event], event=event)
+    metrics.CACHE_SIZE.set(cache_stats["entries"], unit="entries")
+    metrics.CACHE_SIZE.set(cache_stats["bytes"], unit="bytes")
+    metrics.CACHE_SIZE.set(stats["stage_cache"]["entries"], unit="stage_entries")
+    if stats["similarity"] is not None:
+        metrics.CACHE_EVENTS.set_total(stats["similarity"]["hits"], event="near_duplicate_hits")
+        metrics.CACHE_SIZE.set(stats["similarity"]["entries"], unit="similarity_entries")
+    
+    for name, provider in stats["router"]["providers"].items():
+        metrics.UPSTREAM_RETRIES.set_total(provider["retries"], provider=name)
+    metrics.CACHE_EVENTS.set_total(stats["stages"]["hits"], event="stage_hits")
+    metrics.CACHE_EVENTS.set_total(stats["stages"]["misses"], event="stage_misses")
+    metrics.IN_FLIGHT.set(stats["in_flight"], kind="generations")
+    for name, scheduler in stats["schedulers"].items():
+        for lane, count in scheduler["queued"].items():
+            metrics.IN_FLIGHT.set(count, kind="upstream_queued", provider=name, lane=lane)
+    metrics.IN_FLIGHT.set(jobs.get_job_queue().stats()["queued"], kind="jobs_queued")
+    metrics.IN_FLIGHT.set(prefetch.get_prefetcher().stats()["queued"], kind="prefetch_queued")
+
+metrics.REGISTRY.add_collector(collect_service_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 async def root():
@@ -1,104 +1,44 @@
 import os
-from typing import Dict, List, Any
+import asyncio
+import contextlib
+from typing import Dict, List, Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, Set, Tuple
+import json
 import httpx
 import re
 import hashlib
+import time
+import socket
+import uuid
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+from config import load_env
+from .cache import ResultCache
+from .result_store import ResultStore
+from .shared_cache import open_shared_cache
+from .http_client import get_http_client
+from .single_flight import SingleFlight
+from .scheduler import UpstreamScheduler, parse_reset, request_priority, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from .token_budget import budget_for_model, count_tokens
+from .extractor import Extraction, extract
+from .normalizer import NormalizedTranscript, normalize_transcript
+from .similarity import NearDuplicateIndex, Signature
+from . import local_summarizer
+from .pipeline import Pipeline, Stage, Uncached
+from .provider_router import ProviderRouter, ProviderError
+from .retry import RetryPolicy
+from .metrics import LOCAL_SUMMARIES, NORMALIZATION_SAVED, STAGE_LATENCY, UPSTREAM_LATENCY, UPSTREAM_RESPONSES
 
-class AIService:
-    def __init__(self):
-        # Support multiple AI providers
-        self.hf_token = os.getenv("HUGGINGFACE_API_KEY")
-        self.groq_key = os.getenv("GROQ_API_KEY")
-        self.openai_key = os.getenv("OPENAI_API_KEY")
-        
-        # Debug: Print if API key is loaded
-        print(f"[AI Service] HF API Key loaded: {bool(self.hf_token)}")
-        print(f"[AI Service] Groq API Key loaded: {bool(self.groq_key)}")
-        if self.hf_token:
-            print(f"[AI Service] Key preview: {self.hf_token[:10]}...")
-        if self.groq_key:
-            print(f"[AI Service] Groq Key preview: {self.groq_key[:10]}...")
-        
-        # Use Groq as primary provider (HF models are deprecated/410 errors)
-        if self.groq_key:
-            self.provider = "groq"
-        elif self.hf_token:
-            self.provider = "huggingface"
-        elif self.openai_key:
-            self.provider = "openai"
-        else:
-            self.provider = None
-        
-        print(f"[AI Service] Using provider: {self.provider}")
-        
-        # Hugging Face model endpoint (deprecated - for fallback only)
-        self.hf_model = "google/flan-t5-xxl"
-        self.hf_api_url = f"https://api-inference.huggingface.co/models/{self.hf_model}"
-        
-        # Simple in-memory cache (dict instead of lru_cache to avoid event loop issues)
-        self._cache = {}
+# Bump whenever the prompts change so old cached results are not served
+PROMPT_VERSION = "1"
 
-    def _generate_cache_key(self, transcript: str) -> str:
-        """Generate MD5 hash of transcript for cache key"""
-        return hashlib.md5(transcript.encode()).hexdigest()
-    
-    async def process_lecture(self, transcript: str, lecture_title: str, force_refresh: bool = False) -> Dict[str, Any]:
-        """
-        Orchestrates the AI processing pipeline with caching.
-        """
-        cache_key = self._generate_cache_key(transcript)
-        
-        # Clear cache if force refresh
-        if force_refresh:
-            self._cache.clear()
-            print(f"[Cache] Force refresh - cache cleared")
-        
-        # Check cache
-        if cache_key in self._cache and not force_refresh:
-            print(f"[Cache] Hit - cache_key: {cache_key[:8]}...")
-            return self._cache[cache_key]
-        
-        # Process and cache
-        print(f"[Cache] Miss - processing...")
-        result = await self._process_lecture_internal(transcript, lecture_title)
-        self._cache[cache_key] = result
-        
-        return result
-    
-    async def _process_lecture_internal(self, transcript: str, lecture_title: str) -> Dict[str, Any]:
-        """
-        Internal processing logic (called by cached wrapper).
-        """
-        
-        # 1. Summarization
-        summary = await self._generate_summary(transcript, lecture_title)
-        
-        # 2. Code Extraction
-        code_blocks = await self._extract_code(transcript)
-        
-        # 3. Key Concepts (extract from summary or transcript)
-        key_concepts = self._extract_key_concepts(summary)
-        
-        return {
-            "summary": summary,
-            "code_blocks": code_blocks,
-            "key_concepts": key_concepts
-        }
+# Versions of the local pipeline stages; bumping one recomputes only that stage
+# (and the stages reading its output), never the LLM summary
+CODE_STAGE_VERSION = "1"
+KEY_CONCEPTS_STAGE_VERSION = "1"
+# Results cached before they recorded stage versions were made by these
+LEGACY_STAGE_VERSIONS = {"code": "1", "key_concepts": "1"}
 
-    async def _generate_summary(self, transcript: str, title: str) -> str:
-        """Generate summary using available AI provider"""
-        
-        # Truncate transcript if too long (to avoid token limits)
-        max_chars = 8000
-        truncated = transcript[:max_chars] if len(transcript) > max_chars else transcript
-        
-        prompt = f"""You are an expert professor, research engineer, and technical instructor.
+SUMMARY_PROMPT_TEMPLATE = """You are an expert professor, research engineer, and technical instructor.
 
 I will give you a raw transcript of a technical lecture (AI / ML / DL / CS / Math / Engineering).
 
@@ -155,137 +95,1007 @@ FORMATTING REQUIREMENTS:
 
 Lecture Title: {title}
 
-Transcript:
-{truncated}
+{source_label}:
+{transcript}
 
 ---
 
 Generate the complete, exam-level explanation now (DO NOT repeat the transcript):"""
 
-        if self.provider == "huggingface":
-            return await self._call_huggingface(prompt)
-        elif self.provider == "groq":
-            return await self._call_groq(prompt)
+# Map step: condense one slice of a long transcript into faithful notes
+CHUNK_PROMPT_TEMPLATE = """You are an expert technical note-taker.
+
+Below is part {index} of {total} of the raw transcript of a technical lecture titled "{title}".
+
+Write detailed, faithful study notes for THIS PART ONLY:
+- Keep every concept, definition, formula and example, in the order they appear
+- Use proper LaTeX notation enclosed in $...$ or $$...$$ for math
+- Keep any code mentioned, in markdown code blocks with language specification
+- Use concise markdown bullet points; no introduction or conclusion
+- DO NOT repeat the transcript verbatim
+
+Transcript part {index}/{total}:
+{chunk}
+
+---
+
+Write the notes for part {index} now:"""
+
+# Sentence ends or caption line breaks
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+class AIService:
+    def __init__(self):
+        load_env()
+        
+        # Support multiple AI providers
+        self.hf_token = os.getenv("HUGGINGFACE_API_KEY")
+        self.groq_key = os.getenv("GROQ_API_KEY")
+        self.openai_key = os.getenv("OPENAI_API_KEY")
+        
+        # Debug: Print if API key is loaded
+        print(f"[AI Service] HF API Key loaded: {bool(self.hf_token)}")
+        print(f"[AI Service] Groq API Key loaded: {bool(self.groq_key)}")
+        if self.hf_token:
+            print(f"[AI Service] Key preview: {self.hf_token[:10]}...")
+        if self.groq_key:
+            print(f"[AI Service] Groq Key preview: {self.groq_key[:10]}...")
+        
+        # Hugging Face model endpoint (deprecated - for fallback only)
+        self.hf_model = "google/flan-t5-xxl"
+        self.hf_api_url = f"{os.getenv('HF_BASE_URL', 'https://api-inference.huggingface.co')}/models/{self.hf_model}"
+        
+        # Overridable so benchmarks can point at a local stub server
+        self.groq_base_url = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+        self.openai_base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        
+        # Use llama-3.3-70b-versatile which is currently available on Groq
+        self.groq_model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+        self.openai_model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        
+        # Use Groq as primary provider (HF models are deprecated/410 errors);
+        # the others are failover targets when their keys are configured
+        configured = {
+            "groq": self._call_groq if self.groq_key else None,
+            "huggingface": self._call_huggingface if self.hf_token else None,
+            "openai": self._call_openai if self.openai_key else None
+        }
+        order = [name.strip() for name in os.getenv("PROVIDER_ORDER", "groq,huggingface,openai").split(",")]
+        # Transient upstream failures (429, 5xx, timeouts, model loading) are retried
+        # with jittered backoff, honouring Retry-After, within RETRY_DEADLINE seconds
+        self._retry = RetryPolicy(
+            max_attempts=int(os.getenv("RETRY_MAX_ATTEMPTS", "3")),
+            base_delay=float(os.getenv("RETRY_BASE_DELAY", "0.5")),
+            max_delay=float(os.getenv("RETRY_MAX_DELAY", "10")),
+            deadline=float(os.getenv("RETRY_DEADLINE", "60"))
+        )
+        self._router = ProviderRouter(
+            {name: call for name, call in configured.items() if call},
+            order,
+            hedge=os.getenv("HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes"),
+            hedge_delay=float(os.getenv("HEDGE_DELAY", "8")),
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30")),
+            retry=self._retry
+        )
+        self.provider = self._router.primary
+        
+        print(f"[AI Service] Using provider: {self.provider} (failover order: {self._router.order})")
+        
+        # Extractive summary built locally when no provider is configured or all of them
+        # fail (LOCAL_FALLBACK), and optionally streamed ahead of the AI one (LOCAL_PREVIEW)
+        self._local_fallback = os.getenv("LOCAL_FALLBACK", "true").lower() in ("1", "true", "yes")
+        self._local_preview = os.getenv("LOCAL_PREVIEW", "false").lower() in ("1", "true", "yes")
+        
+        # Prompt/completion sizing for the primary model; MAX_PROMPT_TOKENS keeps
+        # single requests under the provider's tokens-per-minute quota
+        self._budget = budget_for_model(
+            self._model_name(),
+            max_prompt_tokens=int(os.getenv("MAX_PROMPT_TOKENS", "6000")),
+            max_output_tokens=int(os.getenv("MAX_TOKENS", "4096"))
+        )
+        
+        # Bounded in-memory LRU/TTL cache (not lru_cache, to avoid event loop issues)
+        self._cache = ResultCache(
+            max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "256")),
+            max_bytes=int(os.getenv("CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("CACHE_TTL", "3600"))
+        )
+        # Stage outputs when there is no shared cache - kept apart so they neither
+        # take result slots nor skew the result hit rate
+        self._stage_cache = ResultCache(
+            max_entries=int(os.getenv("STAGE_CACHE_MAX_ENTRIES", "512")),
+            max_bytes=int(os.getenv("STAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("CACHE_TTL", "3600"))
+        )
+        
+        # Persistent store so results survive restarts (set RESULT_STORE_PATH= to disable)
+        store_path = os.getenv("RESULT_STORE_PATH", str(Path(__file__).parent.parent / "data" / "results.sqlite3"))
+        self._store = ResultStore(store_path) if store_path else None
+        
+        # Results shared by all workers and instances (the store above, or Redis via
+        # SHARED_CACHE_URL), with leases so only one worker generates a given key
+        self._shared = open_shared_cache(os.getenv("SHARED_CACHE_URL", ""), self._store)
+        # Alias keys this process already wrote to the shared cache
+        self._aliases_saved = ResultCache(max_entries=4096, ttl_seconds=None)
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lease_ttl = float(os.getenv("GENERATION_LEASE_TTL", "30"))
+        self._lease_wait = float(os.getenv("GENERATION_LEASE_WAIT", "600"))
+        
+        # Concurrent requests for the same transcript share one upstream call
+        self._inflight = SingleFlight()
+        
+        # Re-captured / lightly edited transcripts reuse the result of a near-identical one
+        # (SIMILARITY_THRESHOLD=0 disables)
+        threshold = float(os.getenv("SIMILARITY_THRESHOLD", "0.85"))
+        self._similar = NearDuplicateIndex(
+            threshold=threshold,
+            max_entries=int(os.getenv("SIMILARITY_MAX_ENTRIES", "50000"))
+        ) if threshold > 0 else None
+        
+        # Summary, code and key concepts as a stage graph: code extraction runs alongside
+        # the summary, and each stage is cached under its own inputs and version
+        self._pipeline = Pipeline([
+            # Keyed under the result namespace, so invalidating a prompt version
+            # or namespace prefix also drops the cached LLM summaries
+            Stage("summary", f"{PROMPT_VERSION}-{self.provider or 'none'}-{self._model_name()}",
+                  inputs=("transcript",), run=self._summary_stage, uses=("title",),
+                  prefix=self._cache_namespace()),
+            Stage("code", CODE_STAGE_VERSION, inputs=("transcript",), run=self._extract_code),
+            Stage("key_concepts", KEY_CONCEPTS_STAGE_VERSION, inputs=("summary",), run=self._extract_key_concepts),
+        ], load=self._load_stage, save=self._save_stage)
+        
+        # Interactive requests in progress and when the last one finished; prefetching
+        # only uses capacity while there are none
+        self._interactive_active = 0
+        self._interactive_at = 0.0
+        
+        # Provider quotas (Groq free tier defaults); calls queue in priority lanes
+        self._schedulers = {
+            "groq": UpstreamScheduler(
+                "groq",
+                requests_per_minute=float(os.getenv("GROQ_RPM", "30")),
+                tokens_per_minute=float(os.getenv("GROQ_TPM", "12000"))
+            ),
+            "huggingface": UpstreamScheduler(
+                "huggingface",
+                requests_per_minute=float(os.getenv("HF_RPM", "30"))
+            ),
+            "openai": UpstreamScheduler(
+                "openai",
+                requests_per_minute=float(os.getenv("OPENAI_RPM", "500")),
+                tokens_per_minute=float(os.getenv("OPENAI_TPM", "200000"))
+            )
+        }
+
+    def _generate_cache_key(self, transcript: str) -> str:
+        """Cache key: prompt version, provider and model, plus MD5 hash of the (normalized) transcript"""
+        return self._cache_key_for_hash(hashlib.md5(transcript.encode()).hexdigest())
+    
+    def _cache_key_for_hash(self, transcript_hash: str) -> str:
+        return f"{self._cache_namespace()}{transcript_hash}"
+    
+    def _cache_namespace(self) -> str:
+        """Key prefix, e.g. 'v1:groq:llama-3.3-70b-versatile:' - changes whenever results would"""
+        return f"v{PROMPT_VERSION}:{self.provider or 'none'}:{self._model_name()}:"
+    
+    def _model_name(self) -> str:
+        if self.provider == "groq":
+            return self.groq_model
+        elif self.provider == "huggingface":
+            return self.hf_model
         elif self.provider == "openai":
-            return await self._call_openai(prompt)
+            return self.openai_model
+        return "local"
+    
+    async def invalidate(self, prefix: Optional[str] = None, version: Optional[str] = None, stale: bool = False) -> Dict[str, int]:
+        """
+        Drop cached results by key prefix, by prompt version, or every entry
+        that does not belong to the current namespace or stage versions (stale=True).
+        """
+        if stale:
+            keep = self._cache_namespace()
+            matches = lambda key: not key.startswith(keep) and not self._pipeline.is_current(key)
+        elif version is not None:
+            version_prefix = f"v{version.lstrip('v')}:"
+            matches = lambda key: key.startswith(version_prefix)
+        elif prefix:
+            matches = lambda key: key.startswith(prefix)
         else:
-            return f"**[Mock Summary for {title}]**\n\nNo AI provider configured. Add HUGGINGFACE_API_KEY to .env for free AI!"
+            raise ValueError("One of prefix, version or stale is required")
+        
+        memory = 0
+        for cache in (self._cache, self._stage_cache):
+            for key in cache.keys():
+                if matches(key) and cache.delete(key):
+                    memory += 1
+        
+        stored = 0
+        if self._shared:
+            stored = await self._shared.delete_where(matches)
+        if self._similar is not None:
+            self._similar.remove_where(matches)
+        
+        print(f"[Cache] Invalidated {memory} memory / {stored} stored entries")
+        return {"memory": memory, "store": stored}
+    
+    @contextlib.contextmanager
+    def _track_interactive(self):
+        if request_priority.get() != PRIORITY_INTERACTIVE:
+            yield
+            return
+        self._interactive_active += 1
+        try:
+            yield
+        finally:
+            self._interactive_active -= 1
+            self._interactive_at = time.monotonic()
+    
+    def interactive_idle_seconds(self) -> float:
+        """Seconds since the last interactive request finished (0 while one is running)"""
+        if self._interactive_active:
+            return 0.0
+        return time.monotonic() - self._interactive_at
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters and queue depths of the caches, providers and schedulers (exported by /metrics)"""
+        return {
+            "cache": self._cache.stats(),
+            "stage_cache": self._stage_cache.stats(),
+            "similarity": self._similar.stats() if self._similar is not None else None,
+            "stages": {"hits": self._pipeline.hits, "misses": self._pipeline.misses},
+            "in_flight": self._inflight.in_flight(),
+            "router": self._router.stats(),
+            "schedulers": {name: scheduler.stats() for name, scheduler in self._schedulers.items()},
+        }
+    
+    def upstream_headroom(self) -> float:
+        """Smallest free share of rate-limit budget across the configured providers"""
+        return min([self._schedulers[name].headroom() for name in self._router.order if name in self._schedulers] or [1.0])
+    
+    async def process_lecture(self, transcript: str, lecture_title: str, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Orchestrates the AI processing pipeline with caching.
+        """
+        with self._track_interactive():
+            normalized = await self._normalize(transcript)
+            return await self._process_normalized(transcript, normalized, lecture_title, force_refresh)
+    
+    async def _process_normalized(self, transcript: str, normalized: NormalizedTranscript, lecture_title: str,
+                                  force_refresh: bool = False, signature: Optional[Signature] = None) -> Dict[str, Any]:
+        # Keyed by the normalized text, so different captures of one lecture share a result
+        cache_key = self._generate_cache_key(normalized.text)
+        await self._save_alias(transcript, cache_key)
+        
+        # Force refresh only evicts this lecture's entry
+        if force_refresh:
+            await self._evict_result(cache_key)
+            print(f"[Cache] Force refresh - evicted ...{cache_key[-8:]}")
+        
+        # Check cache (memory, then persistent store)
+        cached = None if force_refresh else await self._lookup_current(cache_key, normalized.text, lecture_title)
+        if cached is not None:
+            print(f"[Cache] Hit - cache_key: ...{cache_key[-8:]}")
+            await self._index_similar(cache_key, normalized.text)
+            return cached
+        
+        # Then near-duplicates of lectures processed before
+        if signature is None:
+            signature = await self._signature(normalized.text)
+        cached = None if force_refresh else await self._lookup_similar(cache_key, signature, normalized.text, lecture_title)
+        if cached is not None:
+            return cached
+        
+        # Process and cache (coalescing identical concurrent requests, across workers too)
+        async def compute() -> Dict[str, Any]:
+            async def generate() -> Dict[str, Any]:
+                print(f"[Cache] Miss - processing...")
+                result = await self._process_lecture_internal(normalized.text, lecture_title, refresh=force_refresh)
+                if result.get("fallback"):
+                    return result
+                await self._save_result(cache_key, result)
+                if self._similar is not None:
+                    self._similar.add(cache_key, signature)
+                return result
+            
+            return await self._generate_once(cache_key, generate)
+        
+        return await self._inflight.do(cache_key, compute)
+    
+    async def process_batch(self, items: List[Dict[str, Any]], concurrency: int = 3) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process many lectures with at most `concurrency` upstream jobs at once.
+        
+        Yields one status dict per item, in completion order. Cache hits are
+        answered immediately without waiting for a concurrency slot.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run(index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+            # Batch work queues behind interactive requests at the provider
+            request_priority.set(PRIORITY_BATCH)
+            try:
+                transcript = item.get("transcript")
+                if not transcript:
+                    raise ValueError("Transcript is required")
+                
+                normalized = await self._normalize(transcript)
+                lecture_title = item.get("lecture_title") or "Untitled Lecture"
+                signature = None
+                if not item.get("force_refresh"):
+                    cache_key = self._generate_cache_key(normalized.text)
+                    cached = await self._lookup_current(cache_key, normalized.text, lecture_title)
+                    if cached is None:
+                        signature = await self._signature(normalized.text)
+                        cached = await self._lookup_similar(cache_key, signature, normalized.text, lecture_title)
+                    if cached is not None:
+                        return {"index": index, "status": "ok", "cached": True, "result": cached}
+                
+                async with semaphore:
+                    result = await self._process_normalized(
+                        transcript,
+                        normalized,
+                        lecture_title=lecture_title,
+                        force_refresh=bool(item.get("force_refresh")),
+                        signature=signature
+                    )
+                return {"index": index, "status": "ok", "cached": False, "result": result}
+            except Exception as e:
+                return {"index": index, "status": "error", "error": str(e)}
+        
+        tasks = [asyncio.create_task(run(i, item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Client went away - stop scheduling the remaining items
+            for task in tasks:
+                task.cancel()
+    
+    async def stream_lecture(self, transcript: str, lecture_title: str, force_refresh: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_lecture.
+        
+        Yields {"event": ..., "data": ...} dicts: "preview" with the local
+        summary (LOCAL_PREVIEW only), "token" for each piece of the summary as
+        it arrives, then "code_blocks", "key_concepts" and "done". The
+        completed result is cached exactly like process_lecture.
+        """
+        with self._track_interactive():
+            raw_transcript = transcript
+            transcript = (await self._normalize(raw_transcript)).text
+            cache_key = self._generate_cache_key(transcript)
+            await self._save_alias(raw_transcript, cache_key)
+            if force_refresh:
+                await self._evict_result(cache_key)
+            
+            cached = None if force_refresh else await self._lookup_current(cache_key, transcript, lecture_title)
+            if cached is not None:
+                print(f"[Cache] Hit (stream) - cache_key: ...{cache_key[-8:]}")
+                await self._index_similar(cache_key, transcript)
+            signature = None
+            if cached is None:
+                signature = await self._signature(transcript)
+                cached = None if force_refresh else await self._lookup_similar(cache_key, signature, transcript, lecture_title)
+            if cached is not None:
+                yield {"event": "token", "data": {"text": cached["summary"]}}
+                yield {"event": "code_blocks", "data": cached["code_blocks"]}
+                yield {"event": "key_concepts", "data": cached["key_concepts"]}
+                yield {"event": "done", "data": {"cached": True}}
+                return
+            
+            print(f"[Cache] Miss (stream) - processing...")
+            if self._local_preview and self._router.order:
+                # Something to read right away while the AI summary is generated
+                preview = await self._local_summary(transcript, lecture_title, reason="preview")
+                yield {"event": "preview", "data": {"text": preview}}
+            
+            # Same stages as process_lecture, with the summary streamed instead of awaited
+            values = {"transcript": transcript, "title": lecture_title}
+            code_task = asyncio.create_task(self._pipeline.run_stage("code", values, refresh=force_refresh))
+            fallback = False
+            try:
+                summary = None if force_refresh else await self._pipeline.cached("summary", values)
+                if summary is not None:
+                    yield {"event": "token", "data": {"text": summary}}
+                else:
+                    started = time.perf_counter()
+                    parts = []
+                    try:
+                        async for text in self._stream_summary(transcript, lecture_title):
+                            parts.append(text)
+                            yield {"event": "token", "data": {"text": text}}
+                    except ProviderError as e:
+                        if parts or not self._local_fallback:
+                            raise
+                        print(f"[Summary] {e} - falling back to the local summary")
+                        fallback = True
+                        parts.append(await self._local_summary(transcript, lecture_title, reason="provider_error"))
+                        yield {"event": "token", "data": {"text": parts[-1]}}
+                    summary = "".join(parts)
+                    STAGE_LATENCY.observe(time.perf_counter() - started, stage="summary")
+                    if not fallback and summary.strip():
+                        await self._pipeline.store("summary", values, summary)
+                code_blocks, _ = await code_task
+            finally:
+                code_task.cancel()
+            
+            key_concepts, _ = await self._pipeline.run_stage("key_concepts", {"summary": summary}, refresh=force_refresh)
+            yield {"event": "code_blocks", "data": code_blocks}
+            yield {"event": "key_concepts", "data": key_concepts}
+            
+            if fallback:
+                yield {"event": "done", "data": {"cached": False, "fallback": True}}
+                return
+            await self._save_result(cache_key, {
+                "summary": summary,
+                "code_blocks": code_blocks,
+                "key_concepts": key_concepts,
+                "versions": self._pipeline.versions()
+            })
+            if self._similar is not None:
+                self._similar.add(cache_key, signature)
+            yield {"event": "done", "data": {"cached": False}}
+    
+    async def get_cached_result(self, transcript_hash: str) -> Optional[Dict[str, Any]]:
+        """Cached result for the MD5 hash of a transcript as uploaded, without generating one"""
+        cached = await self._lookup_result(self._cache_key_for_hash(transcript_hash), follow_alias=True)
+        if cached is not None and self._outdated_stages(cached):
+            # Needs the transcript to bring its stages up to date
+            return None
+        return cached
+    
+    async def _normalize(self, transcript: str) -> NormalizedTranscript:
+        """Strip caption noise (TRANSCRIPT_NORMALIZE=false to send transcripts as is)"""
+        if os.getenv("TRANSCRIPT_NORMALIZE", "true").lower() not in ("1", "true", "yes"):
+            return NormalizedTranscript(transcript, len(transcript), 0, 0, 0)
+        drop_fillers = os.getenv("TRANSCRIPT_DROP_FILLERS", "false").lower() in ("1", "true", "yes")
+        with STAGE_LATENCY.time(stage="normalize"):
+            if len(transcript) > int(os.getenv("OFFLOAD_THREAD_CHARS", "20000")):
+                normalized = await asyncio.to_thread(normalize_transcript, transcript, drop_fillers)
+            else:
+                normalized = normalize_transcript(transcript, drop_fillers)
+        
+        stats = normalized.stats()
+        NORMALIZATION_SAVED.inc(max(0, stats["saved_chars"]), unit="chars")
+        NORMALIZATION_SAVED.inc(max(0, stats["saved_tokens"]), unit="tokens")
+        if stats["saved_chars"]:
+            print(f"[Normalize] {stats['original_chars']} -> {stats['chars']} chars, "
+                  f"{stats['original_tokens']} -> {stats['tokens']} tokens "
+                  f"({stats['duplicates_removed']} duplicate lines, {stats['fillers_removed']} fillers)")
+        return normalized
+    
+    async def _signature(self, text: str) -> Optional[Signature]:
+        if self._similar is None:
+            return None
+        # Shingling costs milliseconds per 10k chars - keep long transcripts off the event loop
+        if len(text) > int(os.getenv("OFFLOAD_THREAD_CHARS", "20000")):
+            return await asyncio.to_thread(self._similar.signature, text)
+        return self._similar.signature(text)
+    
+    async def _index_similar(self, cache_key: str, text: str) -> None:
+        """Make a result found in the cache available to near-duplicate lookups"""
+        if self._similar is not None and cache_key not in self._similar:
+            self._similar.add(cache_key, await self._signature(text))
+    
+    async def _lookup_similar(self, cache_key: str, signature: Optional[Signature], transcript: str,
+                              title: str) -> Optional[Dict[str, Any]]:
+        if self._similar is None:
+            return None
+        match = self._similar.find(signature, prefix=self._cache_namespace())
+        if match is None or match[0] == cache_key:
+            return None
+        similar_key, similarity = match
+        cached = await self._lookup_result(similar_key)
+        if cached is None:
+            # Expired or invalidated since it was indexed
+            self._similar.remove(similar_key)
+            return None
+        print(f"[Cache] Near-duplicate hit ({similarity:.2f}) - reusing ...{similar_key[-8:]}")
+        result = await self._refresh_stages(cached, transcript, title) or cached
+        # Saved under this transcript's key too, so the next request (or GET
+        # /summary/{hash}) is a plain cache hit without another similarity lookup
+        await self._save_result(cache_key, result)
+        if signature is not None:
+            self._similar.add(cache_key, signature)
+        return result
+    
+    async def _save_alias(self, transcript: str, cache_key: str) -> None:
+        """
+        Point the raw transcript's hash at the normalized result, for GET
+        /summary/{hash} lookups. Aliases live in the shared cache only, so they
+        take no result cache slots, and are written once.
+        """
+        alias_key = self._generate_cache_key(transcript)
+        if alias_key == cache_key or not self._shared or self._aliases_saved.peek(alias_key):
+            return
+        await self._shared.add(alias_key, {"alias_of": cache_key})
+        self._aliases_saved.set(alias_key, True)
+    
+    async def _lookup_result(self, cache_key: str, follow_alias: bool = False) -> Optional[Dict[str, Any]]:
+        """Memory cache first, then the shared cache"""
+        cached = self._cache.get(cache_key)
+        if cached is None and self._shared:
+            cached = await self._shared.get(cache_key)
+            if cached is not None and "alias_of" not in cached:
+                print(f"[Store] Hit - cache_key: ...{cache_key[-8:]}")
+                self._cache.set(cache_key, cached)
+        if cached is not None and "alias_of" in cached:
+            # Raw transcript hash -> result stored under the normalized hash
+            return await self._lookup_result(cached["alias_of"]) if follow_alias else None
+        return cached
+    
+    async def _save_result(self, cache_key: str, result: Dict[str, Any]) -> None:
+        if result.get("fallback") or ("summary" in result and not result["summary"].strip()):
+            # Stand-ins for failed provider calls are never cached - the next request retries
+            return
+        self._cache.set(cache_key, result)
+        if self._shared:
+            await self._shared.set(cache_key, result)
+    
+    async def _evict_result(self, cache_key: str) -> None:
+        self._cache.delete(cache_key)
+        if self._similar is not None:
+            self._similar.remove(cache_key)
+        if self._shared:
+            await self._shared.delete(cache_key)
+    
+    async def _generate_once(self, cache_key: str, generate: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Run `generate` unless another worker is already producing this key.
+        
+        The worker holding the key's lease generates (renewing the lease while it
+        works); the others poll the shared cache for its result. If the holder
+        dies its lease expires and a waiting worker takes over.
+        """
+        if not self._shared:
+            return await generate()
+        
+        deadline = time.monotonic() + self._lease_wait
+        waited = False
+        while not await self._shared.acquire(cache_key, self._worker_id, self._lease_ttl):
+            if not waited:
+                waited = True
+                print(f"[Cache] Another worker is generating ...{cache_key[-8:]} - waiting")
+            await asyncio.sleep(min(1.0, self._lease_ttl / 10))
+            cached = await self._lookup_result(cache_key)
+            if cached is not None:
+                return cached
+            if time.monotonic() > deadline:
+                print(f"[Cache] Gave up waiting for ...{cache_key[-8:]} - generating here")
+                return await generate()
+        
+        renew = asyncio.create_task(self._renew_lease(cache_key))
+        try:
+            # The previous holder may have finished between our lookup and the lease
+            if waited:
+                cached = await self._lookup_result(cache_key)
+                if cached is not None:
+                    return cached
+            return await generate()
+        finally:
+            renew.cancel()
+            await self._shared.release(cache_key, self._worker_id)
+    
+    async def _renew_lease(self, cache_key: str) -> None:
+        while True:
+            await asyncio.sleep(self._lease_ttl / 3)
+            try:
+                await self._shared.acquire(cache_key, self._worker_id, self._lease_ttl)
+            except Exception as e:
+                print(f"[Cache] Could not renew lease on ...{cache_key[-8:]}: {e}")
+    
+    async def _process_lecture_internal(self, transcript: str, lecture_title: str,
+                                        known: Optional[Dict[str, Any]] = None, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Internal processing logic (called by cached wrapper).
+        
+        Summary and code extraction run concurrently, key concepts once the
+        summary is ready; stages in `known` are not recomputed.
+        """
+        outputs, uncached = await self._pipeline.run(
+            {"transcript": transcript, "title": lecture_title}, known=known, refresh=refresh
+        )
+        result = {
+            "summary": outputs["summary"],
+            "code_blocks": outputs["code"],
+            "key_concepts": outputs["key_concepts"],
+            "versions": self._pipeline.versions()
+        }
+        if "summary" in uncached:
+            result["fallback"] = True
+        return result
+    
+    async def _summary_stage(self, transcript: str, title: str) -> Any:
+        try:
+            summary = await self._generate_summary(transcript, title)
+        except ProviderError as e:
+            if not self._local_fallback:
+                raise
+            print(f"[Summary] {e} - falling back to the local summary")
+            return Uncached(await self._local_summary(transcript, title, reason="provider_error"))
+        return summary if summary.strip() else Uncached(summary)
+    
+    def _outdated_stages(self, result: Dict[str, Any]) -> Set[str]:
+        recorded = result.get("versions") or {**self._pipeline.versions(), **LEGACY_STAGE_VERSIONS}
+        return self._pipeline.outdated(recorded)
+    
+    async def _refresh_stages(self, result: Dict[str, Any], transcript: str, title: str) -> Optional[Dict[str, Any]]:
+        """`result` with the stages whose version changed since it was cached recomputed (None if none did)"""
+        outdated = self._outdated_stages(result)
+        if not outdated:
+            return None
+        print(f"[Pipeline] Recomputing {', '.join(sorted(outdated))}")
+        outputs = {"summary": result["summary"], "code": result["code_blocks"], "key_concepts": result["key_concepts"]}
+        known = {name: output for name, output in outputs.items() if name not in outdated}
+        return await self._process_lecture_internal(transcript, title, known=known)
+    
+    async def _lookup_current(self, cache_key: str, transcript: str, title: str) -> Optional[Dict[str, Any]]:
+        """Cached result for the key, brought up to date with the current stage versions"""
+        cached = await self._lookup_result(cache_key)
+        if cached is None:
+            return None
+        refreshed = await self._refresh_stages(cached, transcript, title)
+        if refreshed is None:
+            return cached
+        await self._save_result(cache_key, refreshed)
+        return refreshed
+    
+    async def _load_stage(self, key: str) -> Optional[Any]:
+        # Stage outputs never use the result LRU, leaving it (and its hit rate) to whole results
+        entry = await self._shared.get(key) if self._shared else self._stage_cache.get(key)
+        return entry["output"] if entry is not None else None
+    
+    async def _save_stage(self, key: str, output: Any) -> None:
+        if self._shared:
+            await self._shared.set(key, {"output": output})
+        else:
+            self._stage_cache.set(key, {"output": output})
 
-    async def _call_huggingface(self, prompt: str) -> str:
-        """Call Hugging Face Inference API (FREE)"""
-        if not self.hf_token:
-            return "⚠️ Add HUGGINGFACE_API_KEY to .env file. Get free key at: https://huggingface.co/settings/tokens"
+    async def _generate_summary(self, transcript: str, title: str) -> str:
+        """Generate summary using available AI provider (map-reduce for long transcripts)"""
+        if not self._router.order:
+            return await self._local_summary(transcript, title, reason="no_provider")
+        
+        prompt, max_tokens = await self._prepare_summary_prompt(transcript, title)
+        return await self._call_provider(prompt, title, max_tokens=max_tokens)
+
+    async def _prepare_summary_prompt(self, transcript: str, title: str) -> Tuple[str, int]:
+        """
+        Build the final summary prompt and its max_tokens.
+        
+        The whole transcript is used when it fits the model's input budget;
+        longer ones are condensed chunk by chunk first.
+        """
+        input_budget = self._budget.input_budget(count_tokens(self._build_summary_prompt("", title)))
+        transcript_tokens = count_tokens(transcript)
+        if not self.provider or transcript_tokens <= input_budget:
+            return self._sized_summary_prompt(transcript, transcript_tokens, title)
+        
+        # Long transcript: summarize chunks concurrently (map), then merge the notes (reduce)
+        # A budget of 0 (tiny context window, or SUMMARY_CHUNK_TOKENS=0) still has to make progress
+        chunk_tokens = max(1, min(input_budget, int(os.getenv("SUMMARY_CHUNK_TOKENS", "2000"))))
+        chunks = self._split_transcript(transcript, chunk_tokens)
+        print(f"[Summary] Map-reduce over {len(chunks)} chunks ({transcript_tokens} tokens)")
+        notes = await self._map_chunks(chunks, title)
+        
+        # Notes of very long lectures may still exceed the budget - collapse them again
+        while len(notes) > 1 and count_tokens("\n\n".join(notes)) > input_budget:
+            merged = self._split_transcript("\n\n".join(notes), chunk_tokens)
+            if len(merged) >= len(notes):
+                break
+            notes = await self._map_chunks(merged, title)
+        
+        combined = "\n\n".join(f"### Part {i + 1}\n{note}" for i, note in enumerate(notes))
+        combined = self._budget.fit(combined, input_budget)
+        return self._sized_summary_prompt(combined, count_tokens(combined), title,
+                                          source_label="Notes from each part of the lecture (in order)")
+
+    def _sized_summary_prompt(self, content: str, content_tokens: int, title: str, source_label: str = "Transcript") -> Tuple[str, int]:
+        prompt = self._build_summary_prompt(content, title, source_label=source_label)
+        return prompt, self._budget.output_tokens(content_tokens, count_tokens(prompt))
+
+    def _build_summary_prompt(self, transcript: str, title: str, source_label: str = "Transcript") -> str:
+        return SUMMARY_PROMPT_TEMPLATE.format(title=title, transcript=transcript, source_label=source_label)
+
+    async def _map_chunks(self, chunks: List[str], title: str) -> List[str]:
+        """Summarize chunks concurrently, bounded by SUMMARY_CONCURRENCY"""
+        semaphore = asyncio.Semaphore(int(os.getenv("SUMMARY_CONCURRENCY", "4")))
+        
+        async def summarize(index: int, chunk: str) -> str:
+            prompt = CHUNK_PROMPT_TEMPLATE.format(index=index + 1, total=len(chunks), title=title, chunk=chunk)
+            # Notes are a condensed view of the chunk: about half its size, at most 1024 tokens
+            max_tokens = self._budget.output_tokens(
+                count_tokens(chunk), count_tokens(prompt), max_output_tokens=1024, min_output_tokens=256, output_ratio=0.5
+            )
+            async with semaphore:
+                return await self._call_provider(prompt, title, max_tokens=max_tokens)
+        
+        return list(await asyncio.gather(*(summarize(i, c) for i, c in enumerate(chunks))))
+
+    def _split_transcript(self, transcript: str, max_tokens: int) -> List[str]:
+        """Split text into chunks of at most max_tokens on caption line / sentence boundaries"""
+        max_tokens = max(1, max_tokens)
+        chunks = []
+        current: List[str] = []
+        current_tokens = 0
+        for sentence in _SENTENCE_BOUNDARY.split(transcript):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            tokens = count_tokens(sentence)
+            # Hard-split sentences that are longer than a whole chunk
+            while tokens > max_tokens:
+                if current:
+                    chunks.append(" ".join(current))
+                    current, current_tokens = [], 0
+                # Always consume at least one character, or this loop never ends
+                head = self._budget.fit(sentence, max_tokens) or sentence[:max(1, max_tokens * 4)]
+                chunks.append(head)
+                sentence = sentence[len(head):].strip()
+                tokens = count_tokens(sentence)
+            if not sentence:
+                continue
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += tokens
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
+    async def _local_summary(self, transcript: str, title: str, reason: str) -> str:
+        """Extractive summary computed here (milliseconds, no network)"""
+        LOCAL_SUMMARIES.inc(reason=reason)
+        if len(transcript) > int(os.getenv("OFFLOAD_THREAD_CHARS", "20000")):
+            return await asyncio.to_thread(local_summarizer.summarize, transcript, title)
+        return local_summarizer.summarize(transcript, title)
+
+    async def _call_provider(self, prompt: str, title: str, max_tokens: int = 4096, exclude: Iterable[str] = ()) -> str:
+        """Route the call through the provider router (failover, hedging, circuit breakers)"""
+        return await self._router.call(prompt, max_tokens, exclude=exclude)
+
+    async def _stream_summary(self, transcript: str, title: str) -> AsyncIterator[str]:
+        if not self._router.order:
+            yield await self._local_summary(transcript, title, reason="no_provider")
+            return
+        prompt, max_tokens = await self._prepare_summary_prompt(transcript, title)
+        async for text in self._stream_provider(prompt, title, max_tokens=max_tokens):
+            yield text
+
+    async def _stream_provider(self, prompt: str, title: str, max_tokens: int = 4096) -> AsyncIterator[str]:
+        """Yield summary text incrementally (providers without streaming yield once)"""
+        if self._router.primary != "groq" or not self._router.available("groq"):
+            yield await self._call_provider(prompt, title, max_tokens=max_tokens)
+            return
         
+        health = self._router.health["groq"]
+        started = asyncio.get_running_loop().time()
+        received = False
+        settled = False
+        try:
+            async for text in self._stream_groq(prompt, max_tokens=max_tokens):
+                received = True
+                yield text
+        except ProviderError as e:
+            settled = True
+            wait = None
+            if not received and len(self._router.order) == 1:
+                wait = self._retry.next_delay(e, 1, time.monotonic() + self._retry.deadline)
+            if wait is None:
+                self._router.record_failure("groq", e)
+            else:
+                # The retry below goes through the router, which records how the call ends
+                health.breaker.release()
+            if received:
+                raise
+            # Nothing sent to the client yet - fail over to a non-streaming call
+            if len(self._router.order) > 1:
+                print("[Router] Groq stream failed before first token - failing over")
+                yield await self._call_provider(prompt, title, max_tokens=max_tokens, exclude=["groq"])
+                return
+            if wait is None:
+                raise
+            print(f"[Router] {e} - retrying without streaming in {wait:.1f}s")
+            self._router.health["groq"].retries += 1
+            await asyncio.sleep(wait)
+            yield await self._call_provider(prompt, title, max_tokens=max_tokens)
+            return
+        except Exception:
+            settled = True
+            self._router.record_failure("groq")
+            raise
+        else:
+            settled = True
+            health.latencies.append(asyncio.get_running_loop().time() - started)
+            health.successes += 1
+            health.breaker.record_success()
+        finally:
+            if not settled:
+                # Cancelled, or the client went away mid-stream (GeneratorExit) - not the
+                # provider's fault, but a half-open trial slot taken above must be given back
+                health.breaker.release()
+
+    async def _call_huggingface(self, prompt: str, max_tokens: int = 500) -> str:
+        """Call Hugging Face Inference API (FREE)"""
         headers = {"Authorization": f"Bearer {self.hf_token}"}
         payload = {
             "inputs": prompt,
             "parameters": {
-                "max_new_tokens": 500,
+                "max_new_tokens": min(max_tokens, 500),
                 "temperature": 0.7,
                 "top_p": 0.95,
                 "return_full_text": False
             }
         }
         
+        scheduler = self._schedulers["huggingface"]
+        await scheduler.acquire(count_tokens(prompt) + payload["parameters"]["max_new_tokens"])
+        started = time.perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.hf_api_url, headers=headers, json=payload)
-                
-                if response.status_code == 503:
-                    return "⏳ Model is loading... Try again in 20 seconds (Hugging Face free tier)"
-                
-                response.raise_for_status()
-                result = response.json()
-                
-                # Handle different response formats
-                if isinstance(result, list) and len(result) > 0:
-                    return result[0].get("generated_text", "No summary generated")
-                elif isinstance(result, dict):
-                    return result.get("generated_text", "No summary generated")
-                
-                return str(result)
-                
-        except Exception as e:
-            return f"Error calling Hugging Face: {str(e)}"
+            client = get_http_client()
+            response = await client.post(self.hf_api_url, headers=headers, json=payload)
+        except httpx.HTTPError as e:
+            UPSTREAM_RESPONSES.inc(provider="huggingface", status="error")
+            raise ProviderError("huggingface", f"Error calling Hugging Face: {str(e)}") from e
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, provider="huggingface")
+        UPSTREAM_RESPONSES.inc(provider="huggingface", status=response.status_code)
+        scheduler.observe(response.status_code, response.headers)
+        
+        if response.status_code == 503:
+            # Model is loading (free tier cold start); the body estimates how long
+            try:
+                estimated = float(response.json().get("estimated_time", 20))
+            except (ValueError, AttributeError):
+                estimated = 20.0
+            raise ProviderError("huggingface", "Model is loading", status_code=503, retry_after=estimated)
+        if response.status_code != 200:
+            raise ProviderError("huggingface", f"HTTP {response.status_code}: {response.text[:200]}", status_code=response.status_code)
+        
+        result = response.json()
+        
+        # Handle different response formats
+        if isinstance(result, list) and len(result) > 0:
+            return result[0].get("generated_text", "No summary generated")
+        elif isinstance(result, dict):
+            return result.get("generated_text", "No summary generated")
+        
+        return str(result)
 
-    async def _call_groq(self, prompt: str) -> str:
+    async def _call_groq(self, prompt: str, max_tokens: int = 4096) -> str:
         """Call Groq API (Fast & Free Tier)"""
-        if not self.groq_key:
-            return "Add GROQ_API_KEY to .env"
+        return await self._call_chat_completions(
+            "groq", f"{self.groq_base_url}/chat/completions", self.groq_key, self.groq_model, prompt, max_tokens
+        )
+
+    async def _call_openai(self, prompt: str, max_tokens: int = 4096) -> str:
+        """Call OpenAI API (Paid)"""
+        return await self._call_chat_completions(
+            "openai", f"{self.openai_base_url}/chat/completions", self.openai_key, self.openai_model, prompt, max_tokens
+        )
+
+    async def _call_chat_completions(self, provider: str, url: str, api_key: str, model: str, prompt: str, max_tokens: int) -> str:
+        """Non-streaming call to an OpenAI-compatible chat completions endpoint"""
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.5,
+            "max_tokens": max_tokens,  # 4096 by default for comprehensive explanations
+            "top_p": 1,
+            "stream": False
+        }
+        
+        scheduler = self._schedulers[provider]
+        estimated_tokens = count_tokens(prompt) + max_tokens
+        await scheduler.acquire(estimated_tokens)
+        started = time.perf_counter()
+        try:
+            client = get_http_client()
+            response = await client.post(url, headers=headers, json=payload)
+        except httpx.HTTPError as e:
+            UPSTREAM_RESPONSES.inc(provider=provider, status="error")
+            raise ProviderError(provider, f"Error calling {provider}: {str(e)}") from e
+        finally:
+            UPSTREAM_LATENCY.observe(time.perf_counter() - started, provider=provider)
+        UPSTREAM_RESPONSES.inc(provider=provider, status=response.status_code)
+        scheduler.observe(response.status_code, response.headers)
         
+        if response.status_code != 200:
+            raise ProviderError(
+                provider,
+                f"API Error ({response.status_code}): {response.text[:200]}",
+                status_code=response.status_code,
+                retry_after=parse_reset(response.headers.get("retry-after"))
+            )
+        
+        try:
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError) as e:
+            raise ProviderError(provider, f"Malformed response: {str(e)}", status_code=response.status_code) from e
+        scheduler.reconcile(estimated_tokens, result.get("usage", {}).get("total_tokens", estimated_tokens))
+        return content
+
+    async def _stream_groq(self, prompt: str, max_tokens: int = 4096) -> AsyncIterator[str]:
+        """Call Groq API with stream=True and yield content deltas as they arrive"""
         headers = {
             "Authorization": f"Bearer {self.groq_key}",
             "Content-Type": "application/json"
         }
-        # Use llama-3.3-70b-versatile which is currently available on Groq
         payload = {
-            "model": "llama-3.3-70b-versatile",
+            "model": self.groq_model,
             "messages": [{"role": "user", "content": prompt}],
             "temperature": 0.5,
-            "max_tokens": 4096,  # Increased from 1024 for comprehensive explanations
+            "max_tokens": max_tokens,
             "top_p": 1,
-            "stream": False
+            "stream": True
         }
         
+        scheduler = self._schedulers["groq"]
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    "https://api.groq.com/openai/v1/chat/completions",
-                    headers=headers,
-                    json=payload
-                )
-                
+            # Not routed, so bound the wait for a slot here
+            await asyncio.wait_for(scheduler.acquire(count_tokens(prompt) + max_tokens), self._retry.deadline)
+        except asyncio.TimeoutError as e:
+            raise ProviderError("groq", "Deadline reached waiting for a rate-limit slot") from e
+        started = time.perf_counter()
+        try:
+            client = get_http_client()
+            async with client.stream(
+                "POST",
+                f"{self.groq_base_url}/chat/completions",
+                headers=headers,
+                json=payload
+            ) as response:
+                # Latency here is time to first byte; the body keeps streaming afterwards
+                UPSTREAM_LATENCY.observe(time.perf_counter() - started, provider="groq")
+                UPSTREAM_RESPONSES.inc(provider="groq", status=response.status_code)
+                scheduler.observe(response.status_code, response.headers)
                 if response.status_code != 200:
-                    error_detail = response.text
-                    return f"Groq API Error ({response.status_code}): {error_detail[:200]}"
+                    error_detail = (await response.aread()).decode(errors="replace")
+                    raise ProviderError(
+                        "groq",
+                        f"API Error ({response.status_code}): {error_detail[:200]}",
+                        status_code=response.status_code,
+                        retry_after=parse_reset(response.headers.get("retry-after"))
+                    )
                 
-                result = response.json()
-                return result["choices"][0]["message"]["content"]
-        except httpx.HTTPStatusError as e:
-            return f"Groq HTTP Error: {e.response.status_code} - {e.response.text[:200]}"
-        except Exception as e:
-            return f"Error calling Groq: {str(e)}"
-
-    async def _call_openai(self, prompt: str) -> str:
-        """Call OpenAI API (Paid)"""
-        # Implement if needed
-        return "OpenAI integration - add openai library"
+                # OpenAI-compatible SSE: "data: {json}" lines, terminated by "data: [DONE]"
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        delta = json.loads(data)["choices"][0].get("delta", {})
+                    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                        raise ProviderError("groq", f"Malformed stream chunk: {str(e)}", status_code=response.status_code) from e
+                    if delta.get("content"):
+                        yield delta["content"]
+        except httpx.HTTPError as e:
+            UPSTREAM_RESPONSES.inc(provider="groq", status="error")
+            raise ProviderError("groq", f"Error calling Groq: {str(e)}") from e
 
     async def _extract_code(self, transcript: str) -> List[str]:
-        """Extract code blocks from transcript using regex patterns"""
-        code_blocks = []
-        
-        # ONLY extract from markdown code blocks (```language ... ```)
-        # This prevents matching natural language that contains keywords like "let", "import", etc.
-        markdown_pattern = r'```[\w]*\n(.*?)```'
-        markdown_matches = re.findall(markdown_pattern, transcript, re.DOTALL)
-        
-        for match in markdown_matches:
-            code = match.strip()
-            # Only keep if it's meaningful code (has multiple lines or is long enough)
-            if code and (len(code) > 50 or '\n' in code):
-                code_blocks.append(code)
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_blocks = []
-        for block in code_blocks:
-            if block not in seen:
-                seen.add(block)
-                unique_blocks.append(block)
-        
-        return unique_blocks[:10] if unique_blocks else []
-
-    def _extract_key_concepts(self, summary: str) -> List[str]:
-        """Extract key concepts from summary"""
-        # Simple extraction - look for numbered lists or bullet points
-        concepts = []
-        lines = summary.split('\n')
-        
-        for line in lines:
-            if re.match(r'^\d+\.|\-|\*', line.strip()):
-                concept = re.sub(r'^\d+\.|\-|\*', '', line).strip()
-                if concept and len(concept) > 10:
-                    concepts.append(concept[:100])
-        
-        return concepts[:5] if concepts else ["Main topic covered in lecture"]
+        """Extract fenced code blocks (multi-line or > 50 chars, deduplicated, at most 10)"""
+        # Only fenced blocks: natural language contains keywords like "let", "import", etc.
+        extraction = await self._extract(transcript, max_code_blocks=10, max_bullets=0)
+        return extraction.code_blocks
+
+    async def _extract_key_concepts(self, summary: str) -> List[str]:
+        """Extract key concepts from the summary's bullet points and numbered lists"""
+        extraction = await self._extract(summary, max_code_blocks=0, max_bullets=5)
+        return extraction.bullets or ["Main topic covered in lecture"]
+
+    async def _extract(self, text: str, **limits: int) -> Extraction:
+        # A full-course transcript can take a while to scan - keep it off the event loop
+        if len(text) > int(os.getenv("EXTRACT_THREAD_CHARS", "200000")):
+            return await asyncio.to_thread(extract, text, **limits)
+        return extract(text, **limits)
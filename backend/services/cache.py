@@ -0,0 +1,130 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate stored size of a result in bytes (UTF-8 JSON encoding)"""
+    try:
+        return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return len(str(value).encode("utf-8"))
+
+
+class ResultCache:
+    """
+    Bounded in-memory LRU cache with per-entry TTL and a byte budget.
+
+    Entries are evicted least-recently-used first whenever the entry cap or
+    the byte budget is exceeded. Expired entries are dropped lazily on access.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: Optional[float] = 3600):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+
+        # key -> (value, size_in_bytes, expires_at)
+        self._entries: "OrderedDict[str, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return cached value (and mark it recently used) or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, size, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> bool:
+        """Store value, evicting LRU entries as needed. Returns False if it can never fit."""
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # Larger than the whole budget - storing it would flush everything else
+            self.delete(key)
+            return False
+
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (value, size, expires_at)
+        self._bytes += size
+        self._evict()
+        return True
+
+    def delete(self, key: str) -> bool:
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return value without touching LRU order or counters"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, _, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            return None
+        return value
+
+    def keys(self):
+        return list(self._entries.keys())
+
+    def __contains__(self, key: str) -> bool:
+        return self.peek(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key, (_, size, _) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
@@ -0,0 +1,82 @@
+"""Single-pass extraction of code blocks, inline code, headings and bullets from markdown-ish text"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# All patterns are anchored per line and free of nested quantifiers, so each
+# line is matched in linear time and the whole scan is O(len(text))
+_FENCE = re.compile(r"\s{0,3}(`{3,}|~{3,})\s*([\w+#.-]*)\s*$")
+_HEADING = re.compile(r"\s{0,3}#{1,6}\s+(.+)")
+_BULLET = re.compile(r"\s*(?:[-*+]|\d{1,3}[.)])\s+(.+)")
+_INLINE_CODE = re.compile(r"`([^`\n]{1,200})`")
+_EMPHASIS = re.compile(r"\*{1,3}")
+
+# Lines longer than this are not inspected for headings / bullets / inline code
+MAX_LINE_CHARS = 10_000
+
+
+@dataclass
+class Extraction:
+    code_blocks: List[str] = field(default_factory=list)
+    inline_code: List[str] = field(default_factory=list)
+    headings: List[str] = field(default_factory=list)
+    bullets: List[str] = field(default_factory=list)
+
+
+def extract(text: str, max_code_blocks: Optional[int] = None, max_bullets: Optional[int] = None,
+            min_code_chars: int = 50, min_bullet_chars: int = 10, max_bullet_chars: int = 100) -> Extraction:
+    """
+    Scan text once, line by line.
+
+    Fenced code blocks are kept when multi-line or longer than `min_code_chars`
+    (deduplicated, in order); bullets and numbered items are stripped of their
+    marker and emphasis. A limit of 0 skips that kind of item; scanning stops
+    early once both limits are reached.
+    """
+    result = Extraction()
+    seen_code = set()
+    fence: Optional[str] = None
+    block: List[str] = []
+
+    for line in text.splitlines():
+        if fence is not None:
+            stripped = line.strip()
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                code = "\n".join(block).strip()
+                wanted = max_code_blocks is None or len(result.code_blocks) < max_code_blocks
+                if wanted and code and (len(code) > min_code_chars or "\n" in code) and code not in seen_code:
+                    seen_code.add(code)
+                    result.code_blocks.append(code)
+                fence, block = None, []
+                if _limits_reached(result, max_code_blocks, max_bullets):
+                    break
+            else:
+                block.append(line)
+            continue
+
+        if len(line) > MAX_LINE_CHARS:
+            continue
+        match = _FENCE.match(line)
+        if match:
+            fence = match.group(1)
+            continue
+        match = _HEADING.match(line)
+        if match:
+            result.headings.append(match.group(1).rstrip().rstrip("#").rstrip())
+            continue
+        match = _BULLET.match(line)
+        if match and (max_bullets is None or len(result.bullets) < max_bullets):
+            concept = _EMPHASIS.sub("", match.group(1)).strip()
+            if len(concept) > min_bullet_chars:
+                result.bullets.append(concept[:max_bullet_chars])
+                if _limits_reached(result, max_code_blocks, max_bullets):
+                    break
+        if "`" in line:
+            result.inline_code.extend(_INLINE_CODE.findall(line))
+    return result
+
+
+def _limits_reached(result: Extraction, max_code_blocks: Optional[int], max_bullets: Optional[int]) -> bool:
+    code_done = max_code_blocks is not None and len(result.code_blocks) >= max_code_blocks
+    bullets_done = max_bullets is not None and len(result.bullets) >= max_bullets
+    return code_done and bullets_done
@@ -0,0 +1,52 @@
+"""Application-wide pooled HTTP client shared by all AI provider calls"""
+import os
+from typing import Optional
+
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_enabled() -> bool:
+    if os.getenv("HTTP2", "true").lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401  (httpx needs the h2 package for HTTP/2)
+        return True
+    except ImportError:
+        print("[HTTP] h2 package not installed - falling back to HTTP/1.1")
+        return False
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    )
+    timeout = httpx.Timeout(
+        connect=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+        read=float(os.getenv("HTTP_READ_TIMEOUT", "30")),
+        write=float(os.getenv("HTTP_WRITE_TIMEOUT", "10")),
+        pool=float(os.getenv("HTTP_POOL_TIMEOUT", "5"))
+    )
+    http2 = _http2_enabled()
+    print(f"[HTTP] Client pool opened (max_connections={limits.max_connections}, http2={http2})")
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+async def close_http_client() -> None:
+    """Close the shared client and its pooled connections (called on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        print("[HTTP] Client pool closed")
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use outside the app lifecycle"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
@@ -0,0 +1,163 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .scheduler import request_priority, PRIORITY_BATCH
+
+if TYPE_CHECKING:
+    from .ai_service import AIService
+
+
+class JobQueue:
+    """
+    In-process worker pool for asynchronous lecture processing.
+
+    Jobs are kept in memory and, when a ResultStore is configured, written
+    through to it so that queued or running jobs are picked up again after
+    a restart and finished jobs can still be fetched.
+
+    Several processes may share the store (uvicorn --workers N), so each
+    unfinished job is claimed by one process and its lease renewed every
+    `lease_ttl / 3` seconds. A process resumes only jobs nobody holds: ones
+    released on shutdown, or whose holder stopped renewing.
+    """
+
+    def __init__(self, ai_service: "AIService", workers: int = 2, max_jobs_in_memory: int = 1000,
+                 lease_ttl: float = 60.0):
+        self.ai_service = ai_service
+        self.workers = max(1, workers)
+        self.max_jobs_in_memory = max_jobs_in_memory
+        self.lease_ttl = lease_ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._store = ai_service._store
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        if self._store:
+            # Resume jobs interrupted by the last shutdown
+            await self._resume_unclaimed()
+            self._tasks.append(asyncio.create_task(self._renew_leases()))
+        print(f"[Jobs] Started {self.workers} workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._store:
+            await asyncio.to_thread(self._store.release_jobs, self.owner)
+
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self._queue is None:
+            await self.start()
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "payload": payload,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self._remember(job)
+        await self._persist(job)
+        if self._store:
+            await asyncio.to_thread(self._store.claim_job, job["id"], self.owner, self.lease_ttl)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None and self._store:
+            job = await asyncio.to_thread(self._store.get_job, job_id)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"workers": self.workers if self._tasks else 0, "queued": self._queue.qsize() if self._queue else 0, "jobs": counts}
+
+    async def _resume_unclaimed(self) -> None:
+        for job in await asyncio.to_thread(self._store.unclaimed_jobs):
+            if job["id"] in self._jobs and self._jobs[job["id"]]["status"] in ("queued", "running"):
+                continue
+            if not await asyncio.to_thread(self._store.claim_job, job["id"], self.owner, self.lease_ttl):
+                continue
+            job["status"] = "queued"
+            self._remember(job)
+            self._queue.put_nowait(job["id"])
+            print(f"[Jobs] Resuming job {job['id']}")
+
+    async def _renew_leases(self) -> None:
+        # Keep this process's jobs claimed, and pick up those of processes that died
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                await asyncio.to_thread(self._store.renew_jobs, self.owner, self.lease_ttl)
+                await self._resume_unclaimed()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Jobs] Lease renewal failed: {e}")
+
+    async def _worker(self, index: int) -> None:
+        # Jobs are background work: queue behind interactive requests at the provider,
+        # and do not count as interactive traffic
+        request_priority.set(PRIORITY_BATCH)
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is None:
+                    continue
+                if self._store and not await asyncio.to_thread(self._store.claim_job, job_id, self.owner, self.lease_ttl):
+                    print(f"[Jobs] Job {job_id} was taken over by another worker - skipping")
+                    # Its state now lives in the store, written by the new owner
+                    self._jobs.pop(job_id, None)
+                    continue
+                await self._update(job, status="running")
+                payload = job["payload"]
+                result = await self.ai_service.process_lecture(
+                    transcript=payload["transcript"],
+                    lecture_title=payload.get("lecture_title") or "Untitled Lecture",
+                    force_refresh=bool(payload.get("force_refresh"))
+                )
+                await self._update(job, status="done", result=result)
+            except asyncio.CancelledError:
+                # Left as "running" in the store so it is resumed on next start
+                raise
+            except Exception as e:
+                print(f"[Jobs] Job {job_id} failed: {e}")
+                await self._update(job, status="failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _update(self, job: Dict[str, Any], **changes: Any) -> None:
+        job.update(changes)
+        job["updated_at"] = time.time()
+        await self._persist(job)
+
+    async def _persist(self, job: Dict[str, Any]) -> None:
+        if self._store:
+            await asyncio.to_thread(self._store.save_job, job)
+
+    def _remember(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["id"]] = job
+        # Forget the oldest finished jobs; they remain available from the store
+        if len(self._jobs) > self.max_jobs_in_memory:
+            for job_id in [j for j, v in self._jobs.items() if v["status"] in ("done", "failed")]:
+                if len(self._jobs) <= self.max_jobs_in_memory:
+                    break
+                del self._jobs[job_id]
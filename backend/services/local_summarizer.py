@@ -0,0 +1,138 @@
+"""Local extractive summarizer: TextRank over transcript sentences, no network"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence
+
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z][a-z0-9_+#-]*")
+_FENCED_CODE = re.compile(r"```.*?(?:```|$)", re.DOTALL)
+
+_STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further get gets getting go going gonna got
+had has have having he her here hers him his how i if in into is it its itself just know let like lot make
+me more most much my need no nor not now of off okay ok on once one only or other our out over own really
+right same see she should so some something such take than that the their them then there these they thing
+things this those through to too under until up us use used using very want was we well were what when where
+which while who why will with would yeah yes you your
+""".split())
+
+# TextRank is quadratic in the number of sentences; longer transcripts are
+# scored by similarity to the whole document instead
+TEXTRANK_MAX_SENTENCES = 200
+MIN_SENTENCE_WORDS = 5
+MAX_SENTENCE_CHARS = 400
+
+
+def split_sentences(text: str) -> List[str]:
+    """Prose sentences of a transcript (code blocks and fragments dropped)"""
+    text = _FENCED_CODE.sub("\n", text)
+    sentences = []
+    for sentence in _SENTENCE.split(text):
+        sentence = " ".join(sentence.split())
+        if len(sentence.split()) >= MIN_SENTENCE_WORDS and len(sentence) <= MAX_SENTENCE_CHARS:
+            sentences.append(sentence)
+    return sentences
+
+
+def _terms(sentence: str) -> List[str]:
+    return [word for word in _WORD.findall(sentence.lower()) if len(word) > 2 and word not in _STOPWORDS]
+
+
+def _tfidf(sentences: Sequence[List[str]]) -> List[Dict[str, float]]:
+    """Unit-length TF-IDF vectors, one per sentence"""
+    document_frequency = Counter(term for terms in sentences for term in set(terms))
+    total = len(sentences)
+    vectors = []
+    for terms in sentences:
+        vector = {term: count * math.log(1 + total / document_frequency[term]) for term, count in Counter(terms).items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        vectors.append({term: weight / norm for term, weight in vector.items()})
+    return vectors
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+
+def rank_sentences(sentences: Sequence[str], damping: float = 0.85, iterations: int = 30,
+                   tolerance: float = 1e-4) -> List[float]:
+    """Importance score for every sentence (TextRank, or centroid similarity for long inputs)"""
+    vectors = _tfidf([_terms(sentence) for sentence in sentences])
+    count = len(vectors)
+    if count > TEXTRANK_MAX_SENTENCES:
+        centroid: Dict[str, float] = Counter()
+        for vector in vectors:
+            centroid.update(vector)
+        return [_cosine(vector, centroid) for vector in vectors]
+
+    # Sentence graph weighted by cosine similarity; only pairs sharing a term are compared
+    postings: Dict[str, List[int]] = {}
+    for index, vector in enumerate(vectors):
+        for term in vector:
+            postings.setdefault(term, []).append(index)
+    edges: List[Dict[int, float]] = [{} for _ in range(count)]
+    for index, vector in enumerate(vectors):
+        neighbours = {other for term in vector for other in postings[term] if other > index}
+        for other in neighbours:
+            weight = _cosine(vector, vectors[other])
+            if weight > 0:
+                edges[index][other] = edges[other][index] = weight
+    totals = [sum(neighbours.values()) for neighbours in edges]
+    incoming = [[(other, weight / totals[other]) for other, weight in neighbours.items()] for neighbours in edges]
+
+    scores = [1.0] * count
+    for _ in range(iterations):
+        updated = [(1 - damping) + damping * sum(scores[other] * share for other, share in links) for links in incoming]
+        converged = max(abs(new - old) for new, old in zip(updated, scores)) < tolerance
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def key_terms(sentences: Sequence[str], limit: int) -> List[str]:
+    """Most frequent content words, most frequent first"""
+    counts = Counter(term for sentence in sentences for term in _terms(sentence))
+    return [term for term, _ in counts.most_common(limit)]
+
+
+def summarize(transcript: str, title: str, max_sections: int = 5, section_sentences: int = 3,
+              summary_sentences: int = 6, max_terms: int = 8) -> str:
+    """
+    Markdown summary in the same shape as the AI one: a title, numbered
+    sections following the lecture in order, key terms and a ## Summary with
+    bullet points. Sentences are quoted from the transcript, not rewritten.
+    """
+    sentences = split_sentences(transcript)
+    lines = [f"# {title}", "", "> *Quick extractive summary generated locally; sentences are taken from the transcript.*", ""]
+    if not sentences:
+        lines += ["## Summary", "", "- The transcript is too short to summarize."]
+        return "\n".join(lines)
+
+    scores = rank_sentences(sentences)
+
+    def best(indices: Sequence[int], limit: int) -> List[int]:
+        return sorted(sorted(indices, key=lambda i: scores[i], reverse=True)[:limit])
+
+    # Sections: consecutive slices of the lecture, named after their top terms
+    sections = max(1, min(max_sections, len(sentences) // (section_sentences * 2)))
+    size = math.ceil(len(sentences) / sections)
+    for number, start in enumerate(range(0, len(sentences), size), start=1):
+        indices = range(start, min(start + size, len(sentences)))
+        terms = key_terms([sentences[i] for i in indices], 3)
+        heading = ", ".join(term.capitalize() for term in terms) if terms else f"Part {number}"
+        lines += [f"## {number}. {heading}", ""]
+        lines += [f"- {sentences[i]}" for i in best(indices, section_sentences)]
+        lines.append("")
+
+    terms = key_terms(sentences, max_terms)
+    if terms:
+        lines += ["## Key Terms", "", ", ".join(f"**{term}**" for term in terms), ""]
+
+    lines += ["## Summary", ""]
+    lines += [f"- {sentences[i]}" for i in best(range(len(sentences)), summary_sentences)]
+    return "\n".join(lines)
@@ -0,0 +1,144 @@
+"""Transcript normalization: strip caption noise before the text reaches the model"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List
+
+from .token_budget import count_tokens
+
+# WebVTT / SRT scaffolding and timestamps at the start of a cue
+_CUE_NUMBER = re.compile(r"\d{1,6}")
+_CUE_TIMING = re.compile(r"[\d:.,]+\s*-->\s*[\d:.,]+.*")
+_LEADING_TIMESTAMP = re.compile(r"\[?\(?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?\)?\]?\s*")
+_BRACKETED_TIMESTAMP = re.compile(r"\s*[\[(]\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?[\])]\s*")
+# Sound / speaker tags: [Music], (laughs), [APPLAUSE]
+_SOUND_TAG = re.compile(r"\s*[\[(](?:music|applause|laughter|laughs|silence|inaudible|crosstalk|noise)[\])]\s*", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?:(?<=[.!?…])|(?<=[.!?…][\"')\]]))\s+(?=[\"'(\[]?[A-Z0-9])")
+_FILLERS = re.compile(r"(?:\b(?:u+m+|u+h+|uhm|erm|hmm+)\b[,.]?|\b(?:you know|i mean),)\s*", re.IGNORECASE)
+_STUTTER = re.compile(r"\b(\w+)(?:\s+\1\b)+", re.IGNORECASE)
+_SPACES = re.compile(r"[ \t]+")
+
+# Recent fragments compared against for duplicates (captions repeat while scrolling);
+# shorter fragments ("Okay.") only count as duplicates when directly repeated
+DEDUPE_WINDOW = 32
+DEDUPE_MIN_CHARS = 20
+
+
+@dataclass
+class NormalizedTranscript:
+    text: str
+    original_chars: int
+    original_tokens: int
+    duplicates_removed: int
+    fillers_removed: int
+
+    @property
+    def chars(self) -> int:
+        return len(self.text)
+
+    @property
+    def tokens(self) -> int:
+        return count_tokens(self.text)
+
+    def stats(self) -> Dict[str, int]:
+        tokens = self.tokens
+        return {
+            "original_chars": self.original_chars,
+            "chars": self.chars,
+            "saved_chars": self.original_chars - self.chars,
+            "original_tokens": self.original_tokens,
+            "tokens": tokens,
+            "saved_tokens": self.original_tokens - tokens,
+            "duplicates_removed": self.duplicates_removed,
+            "fillers_removed": self.fillers_removed,
+        }
+
+
+class _Counters:
+    def __init__(self):
+        self.duplicates = 0
+        self.fillers = 0
+
+
+def _fragments(lines: Iterable[str], counters: _Counters, drop_fillers: bool) -> Iterator[str]:
+    """Cleaned caption fragments, with fenced code blocks passed through as single items"""
+    recent: List[str] = []
+    code: List[str] = []
+    in_code = False
+    for line in lines:
+        if line.lstrip().startswith("```"):
+            code.append(line.rstrip())
+            if in_code:
+                yield "\n".join(code)
+                code = []
+            in_code = not in_code
+            continue
+        if in_code:
+            code.append(line.rstrip())
+            continue
+
+        line = line.strip()
+        if not line or line == "WEBVTT" or _CUE_NUMBER.fullmatch(line) or _CUE_TIMING.fullmatch(line):
+            continue
+        line = _LEADING_TIMESTAMP.sub("", line, count=1) if line[:1].isdigit() or line[:1] in "[(" else line
+        line = _SOUND_TAG.sub(" ", _BRACKETED_TIMESTAMP.sub(" ", line))
+        if drop_fillers:
+            line, fillers = _FILLERS.subn("", line)
+            line, stutters = _STUTTER.subn(r"\1", line)
+            counters.fillers += fillers + stutters
+        line = _SPACES.sub(" ", line).strip()
+        if not line:
+            continue
+
+        # The extension joins cues with spaces, so split long lines into sentences too
+        for fragment in _SENTENCE_END.split(line):
+            fragment = fragment.strip()
+            if not fragment:
+                continue
+            fingerprint = fragment.lower()
+            if (recent and fingerprint == recent[-1]) or (len(fingerprint) >= DEDUPE_MIN_CHARS and fingerprint in recent):
+                counters.duplicates += 1
+                continue
+            recent.append(fingerprint)
+            if len(recent) > DEDUPE_WINDOW:
+                recent.pop(0)
+            yield fragment
+    if code:
+        yield "\n".join(code)
+
+
+def iter_sentences(lines: Iterable[str], drop_fillers: bool = False, counters: _Counters = None) -> Iterator[str]:
+    """
+    Stream normalized sentences from raw caption lines.
+
+    Drops cue numbers, timings, timestamps and sound tags, removes caption
+    fragments repeated within the last DEDUPE_WINDOW fragments, and joins
+    fragments until they end a sentence. Fenced code blocks are kept verbatim.
+    """
+    counters = counters or _Counters()
+    pending: List[str] = []
+    for fragment in _fragments(lines, counters, drop_fillers):
+        if fragment.startswith("```"):
+            if pending:
+                yield " ".join(pending)
+                pending = []
+            yield fragment
+            continue
+        pending.append(fragment)
+        if fragment[-1] in ".!?…\"')]":
+            yield " ".join(pending)
+            pending = []
+    if pending:
+        yield " ".join(pending)
+
+
+def normalize_transcript(transcript: str, drop_fillers: bool = False) -> NormalizedTranscript:
+    """Normalized transcript (one sentence per line) plus what was removed"""
+    counters = _Counters()
+    text = "\n".join(iter_sentences(transcript.splitlines(), drop_fillers, counters))
+    return NormalizedTranscript(
+        text=text,
+        original_chars=len(transcript),
+        original_tokens=count_tokens(transcript),
+        duplicates_removed=counters.duplicates,
+        fillers_removed=counters.fillers,
+    )
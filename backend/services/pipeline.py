@@ -0,0 +1,137 @@
+"""Lecture processing as a small graph of stages, each cached on its own inputs and version"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Sequence, Set, Tuple
+
+from .metrics import STAGE_LATENCY
+
+Loader = Callable[[str], Awaitable[Optional[Any]]]
+Saver = Callable[[str, Any], Awaitable[None]]
+
+
+class Uncached:
+    """Stage output that must not be cached (e.g. a stand-in for a failed provider call)"""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+@dataclass
+class Stage:
+    """
+    One step of the pipeline. `run` is called with the values named in
+    `inputs` (pipeline inputs or earlier stages' outputs) and in `uses` as
+    keyword arguments; only `inputs` are part of the cache key. Cache keys
+    start with `prefix`, so a stage can share a namespace with the results
+    it feeds and be invalidated with them.
+    """
+    name: str
+    version: str
+    inputs: Sequence[str]
+    run: Callable[..., Awaitable[Any]]
+    uses: Sequence[str] = ()
+    prefix: str = ""
+
+
+class Pipeline:
+    """
+    Runs every stage as soon as its inputs are ready, so independent stages
+    run concurrently.
+
+    A stage's cache key is its name, its version and a digest of its input
+    values, so it is recomputed only when one of those changes: bumping the
+    key-concepts version reuses the cached summary, while a new transcript
+    reuses nothing.
+    """
+
+    def __init__(self, stages: Sequence[Stage], load: Loader, save: Saver):
+        names = {stage.name for stage in stages}
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            # Stages must come after the stages they read, which also rules out cycles
+            for name in stage.inputs:
+                if name in names and name not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' reads '{name}', which is declared after it")
+            self.stages[stage.name] = stage
+        self._load = load
+        self._save = save
+        self.hits = 0
+        self.misses = 0
+
+    def versions(self) -> Dict[str, str]:
+        return {name: stage.version for name, stage in self.stages.items()}
+
+    def key(self, name: str, values: Mapping[str, Any]) -> str:
+        stage = self.stages[name]
+        digest = hashlib.sha256()
+        for input_name in stage.inputs:
+            digest.update(input_name.encode() + b"\0")
+            digest.update(json.dumps(values[input_name], sort_keys=True, ensure_ascii=False).encode() + b"\0")
+        return f"{stage.prefix}stage:{name}:{stage.version}:{digest.hexdigest()[:32]}"
+
+    def is_current(self, key: str) -> bool:
+        """Whether a cache key belongs to a stage at its current version"""
+        return any(key.startswith(f"{stage.prefix}stage:{name}:{stage.version}:") for name, stage in self.stages.items())
+
+    def outdated(self, recorded: Mapping[str, str]) -> Set[str]:
+        """Stages whose recorded version is not the current one, plus every stage downstream of them"""
+        stale: Set[str] = set()
+        for name, stage in self.stages.items():
+            if recorded.get(name) != stage.version or stale.intersection(stage.inputs):
+                stale.add(name)
+        return stale
+
+    async def cached(self, name: str, values: Mapping[str, Any]) -> Optional[Any]:
+        return await self._load(self.key(name, values))
+
+    async def store(self, name: str, values: Mapping[str, Any], output: Any) -> None:
+        await self._save(self.key(name, values), output)
+
+    async def run_stage(self, name: str, values: Mapping[str, Any], refresh: bool = False) -> Tuple[Any, bool]:
+        """Output of one stage (from cache unless `refresh`, or computed) and whether it may be cached"""
+        stage = self.stages[name]
+        key = self.key(name, values)
+        output = None if refresh else await self._load(key)
+        if output is not None:
+            self.hits += 1
+            return output, True
+        self.misses += 1
+        started = time.perf_counter()
+        output = await stage.run(**{arg: values[arg] for arg in (*stage.inputs, *stage.uses)})
+        STAGE_LATENCY.observe(time.perf_counter() - started, stage=name)
+        if isinstance(output, Uncached):
+            return output.value, False
+        await self._save(key, output)
+        return output, True
+
+    async def run(self, inputs: Mapping[str, Any], known: Optional[Mapping[str, Any]] = None,
+                  refresh: bool = False) -> Tuple[Dict[str, Any], Set[str]]:
+        """
+        Outputs of every stage, and the names of stages whose output was not
+        cacheable. Outputs in `known` are taken as they are; `refresh`
+        recomputes every other stage instead of reading its cache.
+        """
+        values: Dict[str, Any] = dict(inputs)
+        uncached: Set[str] = set()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_one(name: str) -> None:
+            stage = self.stages[name]
+            await asyncio.gather(*(tasks[input_name] for input_name in stage.inputs if input_name in tasks))
+            if known and name in known:
+                values[name] = known[name]
+                return
+            values[name], cacheable = await self.run_stage(name, values, refresh)
+            if not cacheable:
+                uncached.add(name)
+
+        for name in self.stages:
+            tasks[name] = asyncio.create_task(run_one(name))
+        # Let independent stages finish (and be cached) even if another one fails
+        for outcome in await asyncio.gather(*tasks.values(), return_exceptions=True):
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return {name: values[name] for name in self.stages}, uncached
@@ -0,0 +1,114 @@
+"""Speculative background processing of the lectures a student opens next"""
+import asyncio
+import hashlib
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional
+
+from .scheduler import TokenBucket, request_priority, PRIORITY_PREFETCH
+
+if TYPE_CHECKING:
+    from .ai_service import AIService
+
+
+class Prefetcher:
+    """
+    Speculatively processes the lectures a student is likely to open next,
+    using only capacity that interactive traffic leaves unused.
+
+    A prefetch starts only when no interactive request has run for
+    `idle_seconds`, every configured provider still has `min_headroom` of
+    its rate-limit budget free, and fewer than `per_minute` prefetches have
+    started in the last minute. Interactive traffic pauses the queue; calls
+    already started wait in the scheduler's prefetch lane behind every
+    interactive and batch call, until an interactive request for the same
+    lecture joins them. Each submission replaces whatever was still queued,
+    since the student has moved on.
+    """
+
+    def __init__(self, ai_service: "AIService", idle_seconds: float = 2.0, per_minute: float = 4.0,
+                 min_headroom: float = 0.5, max_queue: int = 20, poll_interval: float = 0.5):
+        self.ai_service = ai_service
+        self.idle_seconds = idle_seconds
+        self.min_headroom = min_headroom
+        self.max_queue = max_queue
+        self.poll_interval = poll_interval
+        self._budget = TokenBucket(per_minute, per_minute / 60.0)
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.submitted = 0
+        self.superseded = 0
+        self.completed = 0
+        self.already_cached = 0
+        self.failed = 0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._worker())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def submit(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Queue lectures in the order they are likely to be opened"""
+        await self.start()
+        self.superseded += len(self._queue)
+        self._queue.clear()
+        accepted = [item for item in items if item.get("transcript")][:self.max_queue]
+        self._queue.extend(accepted)
+        self.submitted += len(accepted)
+        self._wakeup.set()
+        return {"queued": len(accepted), "dropped": len(items) - len(accepted)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": len(self._queue),
+            "submitted": self.submitted,
+            "superseded": self.superseded,
+            "completed": self.completed,
+            "already_cached": self.already_cached,
+            "failed": self.failed,
+        }
+
+    def _wait_time(self) -> float:
+        """Seconds until the next prefetch may start (0 = now)"""
+        wait = max(0.0, self.idle_seconds - self.ai_service.interactive_idle_seconds())
+        wait = max(wait, self._budget.wait_time(1))
+        if not wait and self.ai_service.upstream_headroom() < self.min_headroom:
+            wait = self.poll_interval
+        return wait
+
+    async def _worker(self) -> None:
+        # Everything this task sends upstream queues in the prefetch lane
+        request_priority.set(PRIORITY_PREFETCH)
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            wait = self._wait_time()
+            if wait > 0:
+                await asyncio.sleep(min(wait, self.poll_interval))
+                continue
+
+            item = self._queue.popleft()
+            transcript = item["transcript"]
+            title = item.get("lecture_title") or "Untitled Lecture"
+            if await self.ai_service.get_cached_result(hashlib.md5(transcript.encode()).hexdigest()):
+                self.already_cached += 1
+                continue
+            self._budget.take(1)
+            try:
+                print(f"[Prefetch] Processing '{title}'")
+                await self.ai_service.process_lecture(transcript, title)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"[Prefetch] '{title}' failed: {e}")
@@ -0,0 +1,277 @@
+"""Failover, hedging and circuit breaking across AI providers"""
+import asyncio
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from .retry import RetryPolicy
+
+ProviderCall = Callable[[str, int], Awaitable[str]]
+
+
+class ProviderError(Exception):
+    """An upstream provider call failed (HTTP error, timeout, bad response)"""
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """Timeouts, connection errors, 408/409/425/429 and 5xx are worth retrying"""
+        if self.status_code is None:
+            return True
+        return self.status_code in (408, 409, 425, 429) or self.status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds, then lets a single trial call through
+    (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_progress = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            self._trial_in_progress = False
+        if self.state == "half_open" and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Give back a half-open trial slot that was granted but not used"""
+        self._trial_in_progress = False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_progress = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"[Router] Circuit opened after {self.failures} failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+class ProviderHealth:
+    """Circuit breaker plus recent latency samples for one provider"""
+
+    def __init__(self, breaker: CircuitBreaker, samples: int = 100):
+        self.breaker = breaker
+        self.latencies: deque = deque(maxlen=samples)
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < 5:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "circuit": self.breaker.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class ProviderRouter:
+    """
+    Sends each call to the healthiest configured provider, in preference order.
+
+    Providers with an open circuit are skipped. Transient failures are retried
+    on the same provider per the retry policy (within one deadline for the
+    whole call); after that the next provider is tried. With hedging enabled, a second provider is also started when the
+    current one has not answered within its p95 latency, and the first
+    successful answer wins.
+    """
+
+    def __init__(self, providers: Dict[str, ProviderCall], order: List[str], hedge: bool = False,
+                 hedge_delay: float = 8.0, failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 retry: Optional["RetryPolicy"] = None):
+        self.providers = providers
+        self.retry = retry
+        self.order = [name for name in order if name in providers]
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.health = {
+            name: ProviderHealth(CircuitBreaker(failure_threshold, reset_timeout))
+            for name in self.order
+        }
+        self.hedged = 0
+        self.failovers = 0
+
+    @property
+    def primary(self) -> Optional[str]:
+        return self.order[0] if self.order else None
+
+    def available(self, name: str) -> bool:
+        return name in self.health and self.health[name].breaker.allow()
+
+    async def call(self, prompt: str, max_tokens: int, exclude: Iterable[str] = ()) -> str:
+        names = [name for name in self.order if name not in exclude]
+        deadline = time.monotonic() + self.retry.deadline if self.retry else None
+        if self.hedge and len(names) > 1:
+            return await self._call_hedged(names, prompt, max_tokens, deadline)
+
+        last_error: Optional[ProviderError] = None
+        for name in names:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if not self.health[name].breaker.allow():
+                continue
+            if last_error is not None:
+                self.failovers += 1
+                print(f"[Router] Failing over to {name}")
+            try:
+                return await self.attempt_with_retries(name, prompt, max_tokens, deadline)
+            except ProviderError as e:
+                last_error = e
+        raise last_error or self._unavailable()
+
+    async def attempt_with_retries(self, name: str, prompt: str, max_tokens: int, deadline: Optional[float]) -> str:
+        """
+        Call one provider, retrying transient failures while its circuit stays
+        closed. However many attempts it takes, the call is recorded once.
+        """
+        health = self.health[name]
+        attempt = 1
+        try:
+            while True:
+                try:
+                    return await self.attempt(name, prompt, max_tokens, deadline)
+                except ProviderError as e:
+                    wait = self.retry.next_delay(e, attempt, deadline) if self.retry else None
+                    if wait is None:
+                        raise
+                    print(f"[Router] {e} - retry {attempt} in {wait:.1f}s")
+                    health.retries += 1
+                    await asyncio.sleep(wait)
+                    if health.breaker.state == "open":
+                        raise
+                    attempt += 1
+        except asyncio.CancelledError:
+            # Lost a hedge race or the caller went away - not the provider's fault
+            health.breaker.release()
+            raise
+        except ProviderError as e:
+            self.record_failure(name, e)
+            raise
+
+    async def attempt(self, name: str, prompt: str, max_tokens: int, deadline: Optional[float] = None) -> str:
+        """
+        One call to one provider, given up at `deadline` (a time.monotonic()
+        value) - including any wait for a scheduler slot. A success is recorded
+        in its health stats; failures are left to the caller, which knows
+        whether it will retry.
+        """
+        health = self.health[name]
+        started = time.monotonic()
+        try:
+            if deadline is None:
+                result = await self.providers[name](prompt, max_tokens)
+            else:
+                result = await asyncio.wait_for(self.providers[name](prompt, max_tokens), max(0.0, deadline - started))
+        except asyncio.TimeoutError as e:
+            raise ProviderError(name, "Deadline reached before the provider answered") from e
+        except (ProviderError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            raise ProviderError(name, str(e)) from e
+        health.latencies.append(time.monotonic() - started)
+        health.successes += 1
+        health.breaker.record_success()
+        return result
+
+    def record_failure(self, name: str, error: Optional[ProviderError] = None) -> None:
+        """
+        Count a failed call against the provider's circuit. A 429 is a quota
+        signal, which the scheduler already acts on - not ill health - so it
+        only gives back a half-open trial slot.
+        """
+        health = self.health[name]
+        if error is not None and error.status_code == 429:
+            health.breaker.release()
+            return
+        health.failures += 1
+        health.breaker.record_failure()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "order": self.order,
+            "hedge": self.hedge,
+            "hedged": self.hedged,
+            "failovers": self.failovers,
+            "providers": {name: health.stats() for name, health in self.health.items()},
+        }
+
+    def _unavailable(self) -> ProviderError:
+        return ProviderError("router", "All providers are unavailable (circuits open)", status_code=503)
+
+    async def _call_hedged(self, names: List[str], prompt: str, max_tokens: int, deadline: Optional[float]) -> str:
+        remaining = [name for name in names if self.health[name].breaker.allow()]
+        if not remaining:
+            raise self._unavailable()
+        pending = set()
+        errors: List[ProviderError] = []
+
+        def launch() -> str:
+            name = remaining.pop(0)
+            pending.add(asyncio.create_task(self.attempt_with_retries(name, prompt, max_tokens, deadline)))
+            return name
+
+        current = launch()
+        try:
+            while pending:
+                timeout = None
+                if remaining:
+                    timeout = self.health[current].p95() or self.hedge_delay
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Slower than its p95 - race a second provider
+                    self.hedged += 1
+                    current = launch()
+                    print(f"[Router] Hedging with {current}")
+                    continue
+
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+                    if remaining:
+                        self.failovers += 1
+                        current = launch()
+                        print(f"[Router] Failing over to {current}")
+        finally:
+            for task in pending:
+                task.cancel()
+            for name in remaining:
+                self.health[name].breaker.release()
+
+        raise errors[-1]
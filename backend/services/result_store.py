@@ -0,0 +1,221 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+class ResultStore:
+    """
+    Persistent store for processed lectures and background jobs (SQLite in WAL mode).
+
+    The database is opened lazily on first use and looked up one key at a
+    time, so startup cost does not grow with the number of stored results.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " owner TEXT,"
+                " lease_expires REAL)"
+            )
+            # Stores created before jobs were claimed by a worker
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                " key TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+            print(f"[Store] Opened result store at {self.path}")
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO results (key, value, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (key, data, now, now)
+            )
+            conn.commit()
+
+    def add(self, key: str, value: Any) -> bool:
+        """Store value only if key is not stored yet; returns whether it was written"""
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "INSERT INTO results (key, value, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO NOTHING",
+                (key, data, now, now)
+            )
+            conn.commit()
+        return cursor.rowcount > 0
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            conn.commit()
+        return cursor.rowcount > 0
+
+    def delete_where(self, matches: Callable[[str], bool]) -> int:
+        """Delete every result whose key satisfies `matches`; returns the count"""
+        with self._lock:
+            conn = self._connect()
+            keys = [row[0] for row in conn.execute("SELECT key FROM results") if matches(row[0])]
+            conn.executemany("DELETE FROM results WHERE key = ?", [(key,) for key in keys])
+            conn.commit()
+        return len(keys)
+
+    def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        """Take the lease on key if it is free or expired, or renew it if `owner` holds it"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # One statement, so SQLite's write lock makes it atomic across processes
+            conn.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at"
+                " WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (key, owner, now + ttl, now)
+            )
+            conn.commit()
+            row = conn.execute("SELECT owner FROM leases WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def release_lease(self, key: str, owner: str) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+            conn.commit()
+
+    def save_job(self, job: Dict[str, Any]) -> None:
+        result = json.dumps(job["result"], ensure_ascii=False) if job.get("result") is not None else None
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, result, error, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, result = excluded.result,"
+                " error = excluded.error, updated_at = excluded.updated_at",
+                (job["id"], job["status"], json.dumps(job["payload"], ensure_ascii=False), result,
+                 job.get("error"), job["created_at"], job["updated_at"])
+            )
+            conn.commit()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT id, status, payload, result, error, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._job_from_row(row) if row else None
+
+    def unclaimed_jobs(self) -> List[Dict[str, Any]]:
+        """Queued or running jobs that no live process holds (never claimed, released, or lease expired)"""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT id, status, payload, result, error, created_at, updated_at FROM jobs"
+                " WHERE status IN ('queued', 'running') AND (owner IS NULL OR lease_expires < ?)"
+                " ORDER BY created_at",
+                (time.time(),)
+            ).fetchall()
+        return [self._job_from_row(row) for row in rows]
+
+    def claim_job(self, job_id: str, owner: str, ttl: float) -> bool:
+        """Take an unfinished job if it is unclaimed or its lease expired, or renew it if `owner` holds it"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            # One statement, so SQLite's write lock makes it atomic across processes
+            cursor = conn.execute(
+                "UPDATE jobs SET owner = ?, lease_expires = ?"
+                " WHERE id = ? AND status IN ('queued', 'running')"
+                " AND (owner IS NULL OR owner = ? OR lease_expires < ?)",
+                (owner, now + ttl, job_id, owner, now)
+            )
+            conn.commit()
+        return cursor.rowcount > 0
+
+    def renew_jobs(self, owner: str, ttl: float) -> int:
+        """Extend the leases on every unfinished job `owner` holds"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                (time.time() + ttl, owner)
+            )
+            conn.commit()
+        return cursor.rowcount
+
+    def release_jobs(self, owner: str) -> None:
+        """Give up `owner`'s unfinished jobs so the next process to start resumes them"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE jobs SET owner = NULL, lease_expires = NULL WHERE owner = ? AND status IN ('queued', 'running')",
+                (owner,)
+            )
+            conn.commit()
+
+    def _job_from_row(self, row) -> Dict[str, Any]:
+        return {
+            "id": row[0],
+            "status": row[1],
+            "payload": json.loads(row[2]),
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {"path": str(self.path), "entries": count}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,46 @@
+"""Retry policy for upstream calls: jittered exponential backoff within a total deadline"""
+import random
+import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .provider_router import ProviderError
+
+
+class RetryPolicy:
+    """
+    Retries retryable ProviderErrors (timeouts, 408/409/425/429, 5xx) up to
+    `max_attempts` times in total.
+
+    The wait before attempt n is drawn uniformly from [0, min(max_delay,
+    base_delay * 2**n)] ("full jitter", so clients that failed together do not
+    retry together); a Retry-After from the provider is waited out instead,
+    plus a little jitter. No attempt starts after the deadline, and a wait
+    that would end past it is not started - the error is raised right away.
+    The router also cuts off an attempt still running (or still queued at
+    the scheduler) at the deadline.
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 10.0, deadline: float = 60.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number `attempt` (1 for the first retry)"""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def next_delay(self, error: "ProviderError", attempt: int, deadline: float) -> Optional[float]:
+        """
+        Seconds to wait before retrying after `attempt` attempts failed with
+        `error`, or None to give up. `deadline` is a time.monotonic() value.
+        """
+        if not error.retryable or attempt >= self.max_attempts:
+            return None
+        wait = self.delay(attempt, error.retry_after)
+        if time.monotonic() + wait >= deadline:
+            return None
+        return wait
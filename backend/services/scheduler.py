@@ -0,0 +1,272 @@
+"""Rate-limit-aware scheduling of upstream LLM calls"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import re
+import time
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+# Priority lanes - lower value is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_PREFETCH = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BATCH: "batch",
+    PRIORITY_PREFETCH: "prefetch",
+}
+
+# Lane of the current request; set by batch/prefetch entry points and
+# inherited by the tasks they spawn.
+request_priority: contextvars.ContextVar[int] = contextvars.ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
+
+
+class Lane:
+    """
+    Priority shared by every upstream call made for one piece of shared work.
+
+    Raising it re-queues the calls already waiting, so an interactive request
+    that joins work a prefetch started is not served in the prefetch lane.
+    """
+
+    def __init__(self, priority: int):
+        self.priority = priority
+        self._schedulers: Set["UpstreamScheduler"] = set()
+
+    def raise_to(self, priority: int) -> None:
+        if priority >= self.priority:
+            return
+        self.priority = priority
+        for scheduler in self._schedulers:
+            scheduler.promote(self)
+
+
+# Lane of the shared work the current task runs for, if any; takes precedence
+# over request_priority
+request_lane: contextvars.ContextVar[Optional[Lane]] = contextvars.ContextVar("request_lane", default=None)
+
+
+def current_priority() -> int:
+    lane = request_lane.get()
+    return lane.priority if lane is not None else request_priority.get()
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """Parse rate-limit reset values like '7.66s', '2m59.56s', '120ms' or '30' into seconds"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to `capacity`, refills at `rate` per second"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+    def limit_to(self, remaining: float) -> None:
+        """Never believe we have more than the provider says is left"""
+        self._refill()
+        self.tokens = min(self.tokens, remaining)
+
+
+class UpstreamScheduler:
+    """
+    Queues upstream calls in priority lanes and releases them only when the
+    request-per-minute and token-per-minute buckets allow it.
+
+    Buckets are corrected from the provider's x-ratelimit-* response headers,
+    and a 429 pauses dispatch until the advertised reset time.
+    """
+
+    def __init__(self, name: str, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.name = name
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0) if tokens_per_minute else None
+        self._queue: List[Tuple[int, int, float, asyncio.Future, Optional[Lane]]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.dispatched = 0
+        self.rate_limited = 0
+        self.waited_seconds = 0.0
+
+    async def acquire(self, tokens: int, priority: Optional[int] = None) -> None:
+        """Wait for a slot for a call expected to use `tokens` (prompt + completion)"""
+        lane = None
+        if priority is None:
+            lane = request_lane.get()
+            priority = current_priority()
+            if lane is not None:
+                lane._schedulers.add(self)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), float(tokens), future, lane))
+        self._kick()
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Give the budget back if we were granted a slot but the caller went away
+            if future.done() and not future.cancelled() and self._tokens:
+                self._tokens.give(tokens)
+            raise
+        finally:
+            self.waited_seconds += time.monotonic() - started
+
+    def promote(self, lane: Lane) -> None:
+        """Move the calls waiting for `lane` up to its (raised) priority, keeping their order"""
+        self._queue = [
+            (min(priority, lane.priority) if owner is lane else priority, seq, tokens, future, owner)
+            for priority, seq, tokens, future, owner in self._queue
+        ]
+        heapq.heapify(self._queue)
+        if self._queue:
+            self._kick()
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Feed rate-limit headers from a provider response back into the buckets"""
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None and self._tokens:
+            try:
+                self._tokens.limit_to(float(remaining_tokens))
+            except ValueError:
+                pass
+
+        pause = None
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if remaining_requests is not None and remaining_requests.strip() == "0":
+            pause = parse_reset(headers.get("x-ratelimit-reset-requests"))
+
+        if status_code == 429:
+            self.rate_limited += 1
+            # The pause covers the quota; x-ratelimit-remaining-tokens (applied above)
+            # already says how much of it is left
+            pause = parse_reset(headers.get("retry-after")) or parse_reset(headers.get("x-ratelimit-reset-tokens")) or 1.0
+
+        if pause:
+            self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            print(f"[Scheduler:{self.name}] Rate limited - pausing dispatch for {pause:.1f}s")
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a call is known"""
+        if self._tokens and actual >= 0:
+            if actual < estimated:
+                self._tokens.give(estimated - actual)
+            elif actual > estimated:
+                self._tokens.take(actual - estimated)
+
+    def queued(self) -> Dict[str, int]:
+        counts = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, future, _ in self._queue:
+            if not future.done():
+                counts[PRIORITY_NAMES[priority]] += 1
+        return counts
+
+    def headroom(self) -> float:
+        """
+        Share of the request/token budget free right now: 1.0 when idle, 0.0
+        while paused or while interactive or batch calls are queued.
+        """
+        if time.monotonic() < self._paused_until:
+            return 0.0
+        queued = self.queued()
+        if queued["interactive"] or queued["batch"]:
+            return 0.0
+        buckets = [bucket for bucket in (self._requests, self._tokens) if bucket]
+        return max(0.0, min([bucket.available() / bucket.capacity for bucket in buckets] or [1.0]))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued(),
+            "dispatched": self.dispatched,
+            "rate_limited": self.rate_limited,
+            "waited_seconds": round(self.waited_seconds, 3),
+            "tokens_available": round(self._tokens.tokens) if self._tokens else None,
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 3),
+        }
+
+    def _kick(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def _wait_time(self, tokens: float) -> float:
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self._requests:
+            wait = max(wait, self._requests.wait_time(1))
+        if self._tokens:
+            wait = max(wait, self._tokens.wait_time(tokens))
+        return wait
+
+    async def _dispatch(self) -> None:
+        while self._queue:
+            # Drop callers that gave up while queued
+            while self._queue and self._queue[0][3].done():
+                heapq.heappop(self._queue)
+            if not self._queue:
+                break
+
+            _, _, tokens, future, _ = self._queue[0]
+            wait = self._wait_time(tokens)
+            if wait > 0:
+                # Sleep until budget refills, or until a new (maybe higher priority) call arrives
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._queue)
+            if self._requests:
+                self._requests.take(1)
+            if self._tokens:
+                self._tokens.take(tokens)
+            self.dispatched += 1
+            future.set_result(None)
@@ -0,0 +1,160 @@
+"""
+Result cache shared by every worker process and instance, plus generation leases.
+
+A lease is a short-lived, renewable lock on a cache key: the worker holding
+it generates the result, the others wait for it to appear in the shared
+cache instead of calling the provider themselves (cross-worker single flight).
+If the holder dies, its lease expires and another worker takes over.
+
+Backends:
+  - SQLite (default): the persistent result store, in WAL mode, shared by all
+    workers on one machine
+  - Redis, or anything speaking its protocol (Valkey, KeyDB, Dragonfly):
+    SHARED_CACHE_URL=redis://host:6379/0, needs the `redis` package
+"""
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from .result_store import ResultStore
+
+
+class SharedCache(ABC):
+    """Backend interface; every method but stats() is a coroutine"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    async def add(self, key: str, value: Any) -> bool:
+        """Store value only if key is absent; returns whether it was written"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete_where(self, matches: Callable[[str], bool]) -> int:
+        ...
+
+    @abstractmethod
+    async def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        """Take (or renew, if `owner` already holds it) the generation lease on key"""
+
+    @abstractmethod
+    async def release(self, key: str, owner: str) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class SQLiteSharedCache(SharedCache):
+    def __init__(self, store: ResultStore):
+        self.store = store
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.store.get, key)
+
+    async def set(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.store.set, key, value)
+
+    async def add(self, key: str, value: Any) -> bool:
+        return await asyncio.to_thread(self.store.add, key, value)
+
+    async def delete(self, key: str) -> bool:
+        return await asyncio.to_thread(self.store.delete, key)
+
+    async def delete_where(self, matches: Callable[[str], bool]) -> int:
+        return await asyncio.to_thread(self.store.delete_where, matches)
+
+    async def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self.store.acquire_lease, key, owner, ttl)
+
+    async def release(self, key: str, owner: str) -> None:
+        await asyncio.to_thread(self.store.release_lease, key, owner)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": str(self.store.path)}
+
+
+# Renew / release only if the lease still belongs to the caller
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisSharedCache(SharedCache):
+    def __init__(self, url: str, ttl_seconds: Optional[float] = None, namespace: str = "lecture"):
+        import redis.asyncio as redis  # optional dependency
+
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self._results = f"{namespace}:result:"
+        self._leases = f"{namespace}:lease:"
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[Any]:
+        data = await self._redis.get(self._results + key)
+        return json.loads(data) if data is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        ttl = int(self.ttl_seconds) if self.ttl_seconds else None
+        await self._redis.set(self._results + key, json.dumps(value, ensure_ascii=False), ex=ttl)
+
+    async def add(self, key: str, value: Any) -> bool:
+        ttl = int(self.ttl_seconds) if self.ttl_seconds else None
+        return bool(await self._redis.set(self._results + key, json.dumps(value, ensure_ascii=False), ex=ttl, nx=True))
+
+    async def delete(self, key: str) -> bool:
+        return bool(await self._redis.delete(self._results + key))
+
+    async def delete_where(self, matches: Callable[[str], bool]) -> int:
+        deleted = 0
+        async for name in self._redis.scan_iter(match=self._results + "*", count=500):
+            if matches(name[len(self._results):]):
+                deleted += await self._redis.delete(name)
+        return deleted
+
+    async def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        lease = self._leases + key
+        if await self._redis.set(lease, owner, nx=True, px=int(ttl * 1000)):
+            return True
+        return bool(await self._redis.eval(_RENEW_SCRIPT, 1, lease, owner, int(ttl * 1000)))
+
+    async def release(self, key: str, owner: str) -> None:
+        await self._redis.eval(_RELEASE_SCRIPT, 1, self._leases + key, owner)
+
+    def stats(self) -> Dict[str, Any]:
+        # Never expose credentials from the URL
+        parts = urlsplit(self.url)
+        netloc = parts.hostname or ""
+        if parts.port:
+            netloc += f":{parts.port}"
+        return {"backend": "redis", "url": urlunsplit((parts.scheme, netloc, parts.path, "", ""))}
+
+
+def open_shared_cache(url: str, store: Optional[ResultStore], ttl_seconds: Optional[float] = None) -> Optional[SharedCache]:
+    """Backend for SHARED_CACHE_URL ('' or 'sqlite' = the result store, None if that is disabled)"""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSharedCache(url, ttl_seconds=ttl_seconds)
+    if url and url != "sqlite":
+        raise ValueError(f"Unsupported SHARED_CACHE_URL '{url}' (use 'sqlite' or redis://...)")
+    return SQLiteSharedCache(store) if store else None
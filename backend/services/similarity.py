@@ -0,0 +1,129 @@
+"""Near-duplicate transcript index (MinHash signatures with LSH banding)"""
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+_WORD = re.compile(r"\w+")
+
+Signature = Tuple[int, ...]
+
+
+class NearDuplicateIndex:
+    """
+    Finds a cached transcript whose word shingles overlap a new one by at
+    least `threshold` (estimated Jaccard similarity).
+
+    Signatures use one-permutation MinHash: every shingle is hashed once and
+    lands in one of `num_bins` bins, which keep their minimum. Signatures are
+    split into `bands` bands; transcripts sharing any band are candidates and
+    are then compared bin by bin. Lookups touch `bands` buckets and a handful
+    of candidates, independent of how many transcripts are indexed.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_bins: int = 128, bands: int = 16, shingle_words: int = 4,
+                 min_shingles: int = 50, max_entries: int = 50000):
+        if num_bins % bands:
+            raise ValueError("num_bins must be a multiple of bands")
+        self.threshold = threshold
+        self.num_bins = num_bins
+        self.bands = bands
+        self.rows = num_bins // bands
+        self.shingle_words = shingle_words
+        self.min_shingles = min_shingles
+        self.max_entries = max_entries
+        self._signatures: "OrderedDict[str, Signature]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Signature], Set[str]] = {}
+        self.hits = 0
+        self.lookups = 0
+
+    def signature(self, text: str) -> Optional[Signature]:
+        """MinHash signature, or None for texts too short to compare reliably"""
+        words = _WORD.findall(text.lower())
+        count = len(words) - self.shingle_words + 1
+        if count < self.min_shingles:
+            return None
+        empty = 1 << 64
+        bins = [empty] * self.num_bins
+        for i in range(count):
+            shingle = " ".join(words[i:i + self.shingle_words]).encode()
+            value = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "big")
+            index, rest = value % self.num_bins, value // self.num_bins
+            if rest < bins[index]:
+                bins[index] = rest
+        # Densify: empty bins borrow from the next non-empty bin so equal texts stay equal
+        filled = [i for i, value in enumerate(bins) if value != empty]
+        for i, value in enumerate(bins):
+            if value == empty:
+                donor = next((j for j in filled if j > i), filled[0])
+                bins[i] = bins[donor] + (donor - i) % self.num_bins
+        return tuple(bins)
+
+    def add(self, key: str, signature: Optional[Signature]) -> None:
+        if signature is None:
+            return
+        if key in self._signatures:
+            self._signatures.move_to_end(key)
+            return
+        self._signatures[key] = signature
+        for band in self._bands(signature):
+            self._buckets.setdefault(band, set()).add(key)
+        while len(self._signatures) > self.max_entries:
+            self.remove(next(iter(self._signatures)))
+
+    def remove(self, key: str) -> None:
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band in self._bands(signature):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def remove_where(self, predicate: Callable[[str], bool]) -> int:
+        keys = [key for key in self._signatures if predicate(key)]
+        for key in keys:
+            self.remove(key)
+        return len(keys)
+
+    def find(self, signature: Optional[Signature], prefix: str = "") -> Optional[Tuple[str, float]]:
+        """Most similar indexed key (starting with `prefix`) at or above the threshold"""
+        if signature is None:
+            return None
+        self.lookups += 1
+        candidates: Set[str] = set()
+        for band in self._bands(signature):
+            candidates.update(self._buckets.get(band, ()))
+
+        best: Optional[Tuple[str, float]] = None
+        for key in candidates:
+            if not key.startswith(prefix):
+                continue
+            other = self._signatures[key]
+            similarity = sum(a == b for a, b in zip(signature, other)) / self.num_bins
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        if best is not None:
+            self.hits += 1
+            self._signatures.move_to_end(best[0])
+        return best
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self._signatures),
+            "buckets": len(self._buckets),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "threshold": self.threshold,
+        }
+
+    def _bands(self, signature: Signature) -> List[Tuple[int, Signature]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
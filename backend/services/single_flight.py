@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from .scheduler import Lane, current_priority, request_lane
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    The first caller starts the work as a task; later callers with the same
+    key await that task instead of starting their own. A caller that is
+    cancelled (e.g. the client disconnected) does not cancel the shared work,
+    and an error is delivered to every waiter.
+
+    The work runs in a scheduler Lane at the first caller's priority; a
+    caller that joins with a higher priority raises it to theirs.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lanes: Dict[str, Lane] = {}
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            lane = Lane(current_priority())
+            task = asyncio.create_task(self._run(lane, fn))
+            self._tasks[key] = task
+            self._lanes[key] = lane
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.coalesced += 1
+            print(f"[SingleFlight] Joining in-flight request - key: ...{key[-8:]}")
+            self._lanes[key].raise_to(current_priority())
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    @staticmethod
+    async def _run(lane: Lane, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Set inside the task, so only the shared work runs in the lane
+        request_lane.set(lane)
+        return await fn()
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            del self._lanes[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,98 @@
+"""Token counting and prompt / completion budgeting"""
+import math
+import re
+from typing import Optional
+
+try:
+    # Optional: exact BPE counts when tiktoken is installed (close to Llama 3 tokenization)
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+# Context windows of the models we call (tokens)
+MODEL_CONTEXT_TOKENS = {
+    "llama-3.3-70b-versatile": 131072,
+    "gpt-4o-mini": 128000,
+}
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text - exact with tiktoken, otherwise a BPE-like estimate"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    # Common words are one token, long words split every ~4 letters,
+    # numbers every ~3 digits, punctuation and symbols one token each
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        if piece[0].isalpha():
+            tokens += 1 if len(piece) <= 6 else math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+class TokenBudget:
+    """
+    Sizes prompts and completions for one model.
+
+    The prompt may use whatever the context window (capped by
+    `max_prompt_tokens`, e.g. to stay under a tokens-per-minute quota) leaves
+    after reserving room for the answer; the answer is sized in proportion
+    to the content instead of always asking for the maximum.
+    """
+
+    def __init__(self, context_tokens: int, max_prompt_tokens: Optional[int] = None, max_output_tokens: int = 4096,
+                 min_output_tokens: int = 1024, output_ratio: float = 1.0, output_base: int = 512, safety_margin: int = 64):
+        self.context_tokens = context_tokens
+        self.max_prompt_tokens = min(max_prompt_tokens or context_tokens, context_tokens)
+        self.max_output_tokens = max_output_tokens
+        self.min_output_tokens = min(min_output_tokens, max_output_tokens)
+        self.output_ratio = output_ratio
+        self.output_base = output_base
+        self.safety_margin = safety_margin
+
+    def input_budget(self, template_tokens: int) -> int:
+        """Tokens of content that fit next to a template of `template_tokens`"""
+        by_context = self.context_tokens - template_tokens - self.min_output_tokens - self.safety_margin
+        by_prompt_cap = self.max_prompt_tokens - template_tokens
+        return max(0, min(by_context, by_prompt_cap))
+
+    def output_tokens(self, content_tokens: int, prompt_tokens: int, max_output_tokens: Optional[int] = None,
+                      min_output_tokens: Optional[int] = None, output_ratio: Optional[float] = None) -> int:
+        """max_tokens to request for a prompt containing `content_tokens` of content"""
+        cap = min(max_output_tokens or self.max_output_tokens, self.max_output_tokens)
+        floor = min(min_output_tokens if min_output_tokens is not None else self.min_output_tokens, cap)
+        ratio = output_ratio if output_ratio is not None else self.output_ratio
+        wanted = max(floor, min(self.output_base + int(content_tokens * ratio), cap))
+        room = self.context_tokens - prompt_tokens - self.safety_margin
+        return max(1, min(wanted, room))
+
+    def fit(self, text: str, max_tokens: int) -> str:
+        """Longest prefix of text within max_tokens, cut at a line or sentence end where possible"""
+        if count_tokens(text) <= max_tokens:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(text[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        prefix = text[:low]
+        cut = max(prefix.rfind("\n"), prefix.rfind(". "))
+        return prefix[:cut + 1] if cut > len(prefix) // 2 else prefix
+
+
+def budget_for_model(model: str, max_prompt_tokens: Optional[int] = None, max_output_tokens: int = 4096) -> TokenBudget:
+    return TokenBudget(
+        context_tokens=MODEL_CONTEXT_TOKENS.get(model, 8192),
+        max_prompt_tokens=max_prompt_tokens,
+        max_output_tokens=max_output_tokens
+    )
@@ -0,0 +1,128 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from api.compression import CompressionMiddleware
+
+LIMIT = 4096
+DOCUMENT = {"summary": "The lecture covers binary search trees. " * 100}
+
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+
+    @app.get("/document")
+    async def document():
+        return Response(json.dumps(DOCUMENT), media_type="application/json", headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/events")
+    async def events():
+        async def stream():
+            for i in range(3):
+                yield f"data: {i}\n\n" * 200
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500, max_body_bytes=LIMIT)
+    return TestClient(app)
+
+
+def test_gzip_response(client):
+    response = client.get("/document", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == DOCUMENT
+
+
+def test_brotli_response(client):
+    pytest.importorskip("brotli")
+    response = client.get("/document", headers={"Accept-Encoding": "br, gzip"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.json() == DOCUMENT
+
+
+def test_small_and_identity_responses_are_not_compressed(client):
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/document", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_event_stream_is_not_compressed(client):
+    response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.text.startswith("data: 0")
+
+
+def test_etag_is_weakened_on_compressed_responses(client):
+    assert client.get("/document", headers={"Accept-Encoding": "gzip"}).headers["etag"] == 'W/"abc"'
+    assert client.get("/document", headers={"Accept-Encoding": "identity"}).headers["etag"] == '"abc"'
+
+
+def test_gzip_request_body(client):
+    body = b"x" * 3000
+    response = client.post("/echo", content=gzip.compress(body), headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.json() == {"size": len(body)}
+
+
+def test_zstd_request_body(client):
+    zstandard = pytest.importorskip("zstandard")
+    body = b"x" * 3000
+    compressed = zstandard.ZstdCompressor().compress(body)
+    response = client.post("/echo", content=compressed, headers={"Content-Encoding": "zstd"})
+    assert response.status_code == 200
+    assert response.json() == {"size": len(body)}
+
+
+def test_request_body_too_large_after_decompression(client):
+    compressed = gzip.compress(b"x" * (LIMIT * 10))
+    assert len(compressed) < LIMIT
+    response = client.post("/echo", content=compressed, headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 413
+
+
+def test_invalid_gzip_request_body(client):
+    response = client.post("/echo", content=b"not gzip", headers={"Content-Encoding": "gzip"})
+    assert response.status_code == 400
+
+
+def test_unknown_request_encoding(client):
+    response = client.post("/echo", content=b"data", headers={"Content-Encoding": "compress"})
+    assert response.status_code == 415
+
+
+def test_declared_length_over_limit(client):
+    response = client.post("/echo", content=b"x" * (LIMIT + 1))
+    assert response.status_code == 413
+
+
+def test_chunked_body_over_limit(client):
+    def chunks():
+        for _ in range(LIMIT // 512 + 2):
+            yield b"x" * 512
+
+    response = client.post("/echo", content=chunks())
+    assert response.status_code == 413
+
+
+def test_chunked_body_within_limit(client):
+    response = client.post("/echo", content=iter([b"x" * 512] * 4))
+    assert response.status_code == 200
+    assert response.json() == {"size": 2048}
+
+
+def test_invalid_content_length(client):
+    response = client.post("/echo", content=b"data", headers={"Content-Length": "abc"})
+    assert response.status_code == 400
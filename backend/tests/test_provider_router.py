@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from services.provider_router import CircuitBreaker, ProviderError, ProviderRouter
+from services.retry import RetryPolicy
+
+
+def make_router(provider, max_attempts: int = 3) -> ProviderRouter:
+    retry = RetryPolicy(max_attempts=max_attempts, base_delay=0.001, max_delay=0.001, deadline=5)
+    return ProviderRouter({"groq": provider}, ["groq"], failure_threshold=3, reset_timeout=30, retry=retry)
+
+
+def call_failing(router: ProviderRouter, times: int) -> None:
+    async def run():
+        for _ in range(times):
+            with pytest.raises(ProviderError):
+                await router.call("prompt", 100)
+    asyncio.run(run())
+
+
+def test_rate_limits_do_not_open_the_circuit():
+    async def rate_limited(prompt, max_tokens):
+        raise ProviderError("groq", "Rate limited", status_code=429, retry_after=0)
+
+    router = make_router(rate_limited)
+    call_failing(router, 5)
+    health = router.health["groq"]
+    assert health.breaker.state == "closed"
+    assert health.failures == 0
+    assert router.available("groq")
+
+
+def test_failures_are_counted_once_per_call_not_per_retry():
+    attempts = 0
+
+    async def broken(prompt, max_tokens):
+        nonlocal attempts
+        attempts += 1
+        raise ProviderError("groq", "Server error", status_code=500)
+
+    router = make_router(broken)
+    call_failing(router, 2)
+    assert attempts == 6
+    assert router.health["groq"].failures == 2
+    assert router.health["groq"].breaker.state == "closed"
+
+    call_failing(router, 1)
+    assert router.health["groq"].breaker.state == "open"
+
+
+def test_success_after_a_retry_counts_no_failure():
+    attempts = 0
+
+    async def flaky(prompt, max_tokens):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise ProviderError("groq", "Server error", status_code=503)
+        return "summary"
+
+    router = make_router(flaky)
+    assert asyncio.run(router.call("prompt", 100)) == "summary"
+    assert router.health["groq"].failures == 0
+    assert router.health["groq"].successes == 1
+
+
+def test_rate_limit_gives_back_the_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    async def rate_limited(prompt, max_tokens):
+        raise ProviderError("groq", "Rate limited", status_code=429)
+
+    router = make_router(rate_limited, max_attempts=1)
+    router.health["groq"].breaker = breaker
+    call_failing(router, 1)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+from services.provider_router import ProviderError, ProviderRouter
+from services.retry import RetryPolicy
+from services.scheduler import UpstreamScheduler
+
+
+def test_deadline_bounds_the_whole_call():
+    scheduler = UpstreamScheduler("groq", requests_per_minute=30, tokens_per_minute=12000)
+    calls = 0
+
+    async def provider(prompt, max_tokens):
+        nonlocal calls
+        calls += 1
+        await scheduler.acquire(100)
+        # The first answer is a 429 that pauses the scheduler well past the deadline
+        scheduler.observe(429, {"retry-after": "10"})
+        raise ProviderError("groq", "Rate limited", status_code=429, retry_after=0)
+
+    retry = RetryPolicy(max_attempts=5, base_delay=0.01, max_delay=0.01, deadline=0.5)
+    router = ProviderRouter({"groq": provider}, ["groq"], retry=retry)
+
+    async def run():
+        started = time.monotonic()
+        with pytest.raises(ProviderError):
+            await router.call("prompt", 100)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.8
+    assert calls == 2
+
+
+def test_deadline_bounds_a_slow_attempt():
+    async def slow(prompt, max_tokens):
+        await asyncio.sleep(10)
+        return "late"
+
+    retry = RetryPolicy(max_attempts=1, deadline=0.2)
+    router = ProviderRouter({"groq": slow}, ["groq"], retry=retry)
+
+    async def run():
+        started = time.monotonic()
+        with pytest.raises(ProviderError) as error:
+            await router.call("prompt", 100)
+        return time.monotonic() - started, error.value
+
+    elapsed, error = asyncio.run(run())
+    assert elapsed < 0.5
+    assert error.retryable
+
+
+def test_no_wait_is_started_past_the_deadline():
+    retry = RetryPolicy(max_attempts=5, deadline=1)
+    error = ProviderError("groq", "Rate limited", status_code=429, retry_after=30)
+    assert retry.next_delay(error, 1, time.monotonic() + 1) is None
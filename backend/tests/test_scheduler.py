@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+from services.scheduler import UpstreamScheduler, parse_reset
+
+
+def acquire_time(scheduler: UpstreamScheduler, tokens: int) -> float:
+    async def run():
+        started = time.monotonic()
+        await scheduler.acquire(tokens)
+        return time.monotonic() - started
+    return asyncio.run(run())
+
+
+def test_rate_limit_pause_lasts_as_long_as_retry_after():
+    scheduler = UpstreamScheduler("groq", requests_per_minute=600, tokens_per_minute=12000)
+    scheduler.observe(429, {"retry-after": "0.3", "x-ratelimit-remaining-tokens": "11000"})
+    assert 0.25 < acquire_time(scheduler, 1000) < 0.6
+
+
+def test_rate_limit_does_not_empty_the_token_bucket():
+    scheduler = UpstreamScheduler("groq", requests_per_minute=600, tokens_per_minute=12000)
+    scheduler.observe(429, {"retry-after": "0.1", "x-ratelimit-remaining-tokens": "9000"})
+    assert scheduler.stats()["tokens_available"] >= 9000
+
+
+def test_remaining_tokens_header_limits_the_bucket():
+    scheduler = UpstreamScheduler("groq", tokens_per_minute=12000)
+    scheduler.observe(200, {"x-ratelimit-remaining-tokens": "500"})
+    assert scheduler.stats()["tokens_available"] <= 501
+
+
+def test_parse_reset():
+    assert parse_reset("7.66s") == 7.66
+    assert parse_reset("2m59.56s") == 179.56
+    assert parse_reset("120ms") == 0.12
+    assert parse_reset("30") == 30.0
+    assert parse_reset("soon") is None
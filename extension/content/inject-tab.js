@@ -572,6 +572,26 @@ async function triggerGeneration(forceRefresh = false) {
 
         console.log('[Udemy AI] Calling backend:', backendUrl);
 
+        // Ask for the result by transcript hash first - avoids uploading the
+        // whole transcript when the server already has it (404 = not cached)
+        if (!forceRefresh && window.UdemyAICache) {
+            try {
+                const transcriptHash = window.UdemyAICache.md5Hex(transcript);
+                const lookup = await fetch(`${backendUrl}/api/summary/${transcriptHash}`);
+                if (lookup.ok) {
+                    const data = await lookup.json();
+                    console.log('[Udemy AI] ⚡ Server already had this transcript');
+                    if (!data.fallback) {
+                        window.UdemyAICache.setCachedSummary(window.location.href, transcript, data);
+                    }
+                    renderResult(data, false);
+                    return;
+                }
+            } catch (e) {
+                console.log('[Udemy AI] Summary lookup failed, uploading transcript:', e.message);
+            }
+        }
+
         // Build request body - only include force_refresh if true (backward compatibility)
         const requestBody = {
             transcript: transcript,
@@ -593,8 +613,8 @@ async function triggerGeneration(forceRefresh = false) {
 
         const data = await response.json();
 
-        // Store in cache
-        if (window.UdemyAICache) {
+        // Store in cache - but not a fallback summary, so the next visit asks again
+        if (window.UdemyAICache && !data.fallback) {
             window.UdemyAICache.setCachedSummary(window.location.href, transcript, data);
         }
 
@@ -17,6 +17,53 @@ function simpleHash(str) {
     return Math.abs(hash).toString(36);
 }
 
+/**
+ * MD5 hex digest of a string's UTF-8 bytes (matches the backend's transcript hash;
+ * Web Crypto has no MD5)
+ */
+function md5Hex(str) {
+    const bytes = new TextEncoder().encode(str);
+    const length = bytes.length;
+    const words = new Uint32Array((((length + 8) >>> 6) + 1) * 16);
+    for (let i = 0; i < length; i++) {
+        words[i >> 2] |= bytes[i] << ((i % 4) * 8);
+    }
+    words[length >> 2] |= 0x80 << ((length % 4) * 8);
+    words[words.length - 2] = (length * 8) >>> 0;
+    words[words.length - 1] = Math.floor(length / 0x20000000);
+
+    const shifts = [7, 12, 17, 22, 5, 9, 14, 20, 4, 11, 16, 23, 6, 10, 15, 21];
+    const constants = new Uint32Array(64);
+    for (let i = 0; i < 64; i++) {
+        constants[i] = Math.floor(Math.abs(Math.sin(i + 1)) * 0x100000000);
+    }
+
+    let a0 = 0x67452301, b0 = 0xefcdab89, c0 = 0x98badcfe, d0 = 0x10325476;
+    for (let block = 0; block < words.length; block += 16) {
+        let a = a0, b = b0, c = c0, d = d0;
+        for (let i = 0; i < 64; i++) {
+            let f, g;
+            if (i < 16) { f = (b & c) | (~b & d); g = i; }
+            else if (i < 32) { f = (d & b) | (~d & c); g = (5 * i + 1) % 16; }
+            else if (i < 48) { f = b ^ c ^ d; g = (3 * i + 5) % 16; }
+            else { f = c ^ (b | ~d); g = (7 * i) % 16; }
+            const shift = shifts[(i >> 4) * 4 + (i % 4)];
+            const sum = (a + f + constants[i] + words[block + g]) >>> 0;
+            a = d; d = c; c = b;
+            b = (b + ((sum << shift) | (sum >>> (32 - shift)))) >>> 0;
+        }
+        a0 = (a0 + a) >>> 0; b0 = (b0 + b) >>> 0; c0 = (c0 + c) >>> 0; d0 = (d0 + d) >>> 0;
+    }
+
+    let hex = '';
+    for (const word of [a0, b0, c0, d0]) {
+        for (let i = 0; i < 4; i++) {
+            hex += ((word >>> (i * 8)) & 0xff).toString(16).padStart(2, '0');
+        }
+    }
+    return hex;
+}
+
 /**
  * Generate cache key from URL and transcript
  */
@@ -177,6 +224,7 @@ function getCacheStats() {
 
 // Export functions for use in inject-tab.js
 window.UdemyAICache = {
+    md5Hex,
     getCachedSummary,
     getCachedSummaryByUrl,
     setCachedSummary,